@@ -0,0 +1,197 @@
+# batch.py
+"""
+Headless batch nesting.
+
+    python batch.py JOB_OR_DIRECTORY [-o OUTPUT] [-w WORKERS] [--trace] [--profile]
+
+A job is a JSON or YAML file:
+
+    parts:    [{file: part.dxf, quantity: 3, import: {units: mm}}, {name: P1, width: 100, height: 50}]
+    sheets:   [{name: S1, width: 1000, height: 500, quantity: 2}]
+    settings: {genetic_algorithm: {generations: 50}}   # merged over config/settings.json
+    strategy: Island Model                              # optional
+
+Part files are resolved relative to the job file. Each job writes
+`layout.json` and `summary.csv` to OUTPUT/<job name>/, plus `trace.json`
+(Chrome trace of the import and nesting stages) with --trace and
+`profile.prof` (cProfile stats) with --profile; both can also be switched
+on under `profiling` in the settings. Nothing here may import PyQt; the
+GUI lives in main.py.
+"""
+
+import time
+
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import contextlib
+import copy
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.instrumentation import profiled, recording
+from core.nesting_engine import NestingEngine
+from reports.summary_report import SummaryReport
+
+# Seconds spent importing the nesting core
+STARTUP_SECONDS = time.perf_counter() - _IMPORT_START
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config', 'settings.json')
+JOB_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+
+def load_job(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def merge_settings(base, overrides):
+    """Copy of `base` with `overrides` merged in, nested dicts included."""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_parts(entries, base_dir, cache_dir=None):
+    """
+    Part dicts for the job's part entries (files or plain rectangles), each
+    stored once with its `quantity`; the engine nests that many copies.
+    """
+    parts = []
+    for entry in entries:
+        quantity = int(entry.get('quantity', 1))
+        if 'file' in entry:
+            # Imported lazily: ezdxf dominates startup and plain jobs skip it.
+            from core.cad_importer import import_files
+            path = os.path.join(base_dir, entry['file'])
+            _, loaded, error = next(import_files([path], 1, entry.get('import'), cache_dir))
+            if error is not None:
+                raise ValueError(f"Error importing {entry['file']}: {error}")
+        else:
+            loaded = [{k: v for k, v in entry.items() if k != 'quantity'}]
+        for part in loaded:
+            part = dict(part)
+            part['quantity'] = int(part.get('quantity', 1)) * quantity
+            parts.append(part)
+    return parts
+
+
+def layout_record(result):
+    # JSON-friendly view of NestingEngine.nest() output
+    return {
+        'efficiency': result['efficiency'],
+        'cost': result['cost'],
+        'seed': result.get('seed'),
+        'valid': result.get('valid'),
+        'sheets': [{
+            'sheet': layout['sheet'],
+            'efficiency': layout['efficiency'],
+            'violations': layout.get('violations'),
+            'placements': [{
+                'name': gene['part'].get('name', 'N/A'),
+                'angle': gene['angle'],
+                'x': gene['pos'][0],
+                'y': gene['pos'][1],
+            } for gene in layout['genes']],
+        } for layout in result['sheets']],
+        'unplaced': [p.get('name', 'N/A') for p in result['unplaced']],
+        'stats': result.get('stats', {}),
+    }
+
+
+def run_job(path, output_dir, settings_path=CONFIG_PATH, trace=False, profile=False):
+    """Nest one job file and write its outputs; returns a summary dict."""
+    started = time.perf_counter()
+    job = load_job(path)
+    with open(settings_path, 'r', encoding='utf-8') as f:
+        settings = merge_settings(json.load(f), job.get('settings'))
+    profiling = settings.get('profiling', {})
+    trace = trace or profiling.get('trace', False)
+    profile = profile or profiling.get('cprofile', False)
+    name = os.path.splitext(os.path.basename(path))[0]
+    out = os.path.join(output_dir, name)
+    os.makedirs(out, exist_ok=True)
+
+    with recording() if trace else contextlib.nullcontext() as recorder, \
+            profiled(os.path.join(out, 'profile.prof') if profile else None):
+        cache_dir = settings.get('file_paths', {}).get('import_cache')
+        parts = load_parts(job.get('parts', []), os.path.dirname(os.path.abspath(path)),
+                           os.path.expanduser(cache_dir) if cache_dir else None)
+        sheets = job['sheets']
+        loaded = time.perf_counter()
+
+        result = NestingEngine(settings, job.get('strategy')).nest(parts, sheets)
+        nested = time.perf_counter()
+
+    record = layout_record(result)
+    record['timings'] = {'startup': STARTUP_SECONDS, 'load': loaded - started, 'nest': nested - loaded}
+    if recorder is not None:
+        record['stats']['profile'] = recorder.summary()
+        recorder.save(os.path.join(out, 'trace.json'))
+    with open(os.path.join(out, 'layout.json'), 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    SummaryReport(result['sheets'], [l['sheet'] for l in result['sheets']],
+                  os.path.join(out, 'summary.csv'), result.get('seed')).generate_csv()
+    return {'job': name, 'output': out, 'efficiency': result['efficiency'],
+            'sheets': len(result['sheets']), 'seconds': time.perf_counter() - started}
+
+
+def find_jobs(target):
+    if os.path.isdir(target):
+        return [os.path.join(target, f) for f in sorted(os.listdir(target))
+                if f.lower().endswith(JOB_EXTENSIONS)]
+    return [target]
+
+
+def _run_job_safe(path, output_dir, trace=False, profile=False):
+    # One broken job must not take the rest of the directory down with it
+    try:
+        return run_job(path, output_dir, trace=trace, profile=profile)
+    except Exception as e:
+        return {'job': os.path.basename(path), 'error': f'{type(e).__name__}: {e}'}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run nesting jobs without the GUI.')
+    parser.add_argument('target', help='job file (.json/.yaml) or directory of jobs')
+    parser.add_argument('-o', '--output', default='output', help='output directory')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='jobs processed concurrently')
+    parser.add_argument('--trace', action='store_true', help='write a Chrome trace per job')
+    parser.add_argument('--profile', action='store_true', help='write cProfile stats per job')
+    args = parser.parse_args(argv)
+
+    print(f'Startup: {STARTUP_SECONDS * 1000:.0f} ms')
+    jobs = find_jobs(args.target)
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(args.workers, len(jobs)),
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            summaries = list(pool.map(_run_job_safe, jobs, [args.output] * len(jobs),
+                                      [args.trace] * len(jobs), [args.profile] * len(jobs)))
+    else:
+        summaries = [_run_job_safe(job, args.output, args.trace, args.profile) for job in jobs]
+
+    failed = 0
+    for summary in summaries:
+        if 'error' in summary:
+            failed += 1
+            print(f"{summary['job']}: FAILED {summary['error']}")
+        else:
+            print(f"{summary['job']}: {summary['sheets']} sheets, efficiency {summary['efficiency']:.2%}, "
+                  f"{summary['seconds']:.2f} s -> {summary['output']}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
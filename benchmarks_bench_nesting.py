@@ -0,0 +1,254 @@
+# benchmarks/bench_nesting.py
+"""
+Speed and quality benchmarks for NestingEngine.nest.
+
+    python -m benchmarks.bench_nesting [-o results.json] [-i NAME ...] [-r REPEAT]
+                                       [--compare BASELINE.json]
+
+Instances are generated locally from a fixed seed: synthetic rectangle and
+polygon sets, plus instances modelled on classic ESICUP strip-packing
+datasets (piece shapes, counts, strip widths and allowed orientations in
+the style of jakobs, shapes and albano; not the original coordinates).
+Repeated piece types are given once with a `quantity`, as in the datasets.
+
+Each instance records wall time (best of REPEAT runs), GA generations and
+fitness evaluations per second, peak Python heap (tracemalloc, measured in
+a separate run so tracing does not skew the timings; worker processes are
+not included) and material utilization. Results are written as JSON;
+`--compare` reports instances that got slower or lost utilization against
+an earlier results file and exits non-zero if any did.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import shapely
+from shapely.affinity import translate
+from shapely.geometry import MultiPoint, Polygon, box
+
+from core.nesting_engine import NestingEngine
+
+SEED = 20240601
+# Small GA budget: long enough to exercise every stage, short enough for CI
+BENCH_SETTINGS = {
+    'genetic_algorithm': {
+        'population_size': 30,
+        'generations': 20,
+        'rotation_angles': [0, 90, 180, 270],
+        'workers': 1,
+    },
+    'spacing': {'part_to_part': 0.0, 'margin': 0.0},
+}
+
+
+def _part(geom, name):
+    minx, miny, maxx, maxy = geom.bounds
+    geom = translate(geom, -minx, -miny)
+    return {'geometry': geom, 'name': name, 'width': maxx - minx, 'height': maxy - miny, 'area': geom.area}
+
+
+def _strip(parts, width, slack=1.6):
+    # One strip long enough for everything, as in strip packing
+    length = slack * sum(p['area'] * p.get('quantity', 1) for p in parts) / width
+    length = max(length, max(max(p['width'], p['height']) for p in parts))
+    return [{'name': 'strip', 'width': float(width), 'height': float(np.ceil(length)), 'quantity': 1}]
+
+
+def rectangles(count, seed=SEED):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(5, 60, size=(count, 2))
+    parts = [_part(box(0, 0, w, h), f'R{i}') for i, (w, h) in enumerate(sizes)]
+    return parts, [{'name': 'S1', 'width': 250.0, 'height': 250.0, 'quantity': count}], [0, 90]
+
+
+def polygons(count, seed=SEED):
+    rng = np.random.default_rng(seed)
+    parts = []
+    for i in range(count):
+        points = rng.uniform(0, rng.uniform(10, 60), size=(rng.integers(5, 12), 2))
+        parts.append(_part(MultiPoint(points).convex_hull, f'P{i}'))
+    return parts, [{'name': 'S1', 'width': 150.0, 'height': 150.0, 'quantity': count}], [0, 90, 180, 270]
+
+
+def jakobs_like(seed=SEED):
+    """25 orthogonal pieces (rectangles, L, T and U shapes), strip width 40."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for i in range(25):
+        w, h = rng.integers(4, 13, size=2)
+        t = max(1, int(min(w, h) // 3))
+        kind = i % 4
+        if kind == 0:
+            geom = box(0, 0, w, h)
+        elif kind == 1:
+            geom = Polygon([(0, 0), (w, 0), (w, t), (t, t), (t, h), (0, h)])
+        elif kind == 2:
+            geom = Polygon([(0, 0), (w, 0), (w, t), ((w + t) / 2, t), ((w + t) / 2, h),
+                            ((w - t) / 2, h), ((w - t) / 2, t), (0, t)])
+        else:
+            geom = Polygon([(0, 0), (w, 0), (w, h), (w - t, h), (w - t, t), (t, t), (t, h), (0, h)])
+        parts.append(_part(geom, f'J{i}'))
+    return parts, _strip(parts, 40), [0, 90, 180, 270]
+
+
+def shapes_like(seed=SEED):
+    """43 pieces of four non-convex types, strip width 40, fixed orientation."""
+    rng = np.random.default_rng(seed)
+    types = []
+    for _ in range(4):
+        # Star-shaped outline: irregular radii around a centre
+        angles = np.sort(rng.uniform(0, 2 * np.pi, rng.integers(6, 10)))
+        radii = rng.uniform(2, 7, len(angles))
+        types.append(Polygon(np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])).buffer(0))
+    quantities = [15, 11, 9, 8]
+    parts = [dict(_part(types[k], f'S{k}'), quantity=q) for k, q in enumerate(quantities)]
+    return parts, _strip(parts, 40), [0]
+
+
+def albano_like(seed=SEED):
+    """24 garment-like pieces of eight types, strip width 4900, turned 0 or 180."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for k in range(8):
+        w, h = rng.uniform(400, 1600), rng.uniform(600, 1800)
+        points = np.column_stack([rng.uniform(0, w, 10), rng.uniform(0, h, 10)])
+        geom = MultiPoint(np.vstack([points, [(0, 0), (w, 0), (w * 0.8, h), (w * 0.2, h)]])).convex_hull
+        parts.append(dict(_part(geom, f'A{k}'), quantity=3))
+    return parts, _strip(parts, 4900), [0, 180]
+
+
+INSTANCES = {
+    'rectangles-50': lambda: rectangles(50),
+    'rectangles-200': lambda: rectangles(200),
+    'polygons-40': lambda: polygons(40),
+    'jakobs-like': jakobs_like,
+    'shapes-like': shapes_like,
+    'albano-like': albano_like,
+}
+
+
+def _nest(parts, sheets, settings):
+    engine = NestingEngine(settings)
+    started = time.perf_counter()
+    result = engine.nest(parts, sheets)
+    return result, time.perf_counter() - started
+
+
+def run_instance(name, settings=None, repeat=3, seed=SEED):
+    """Benchmark one instance from INSTANCES and return its result record."""
+    parts, sheets, angles = INSTANCES[name]()
+    settings = json.loads(json.dumps(settings or BENCH_SETTINGS))
+    ga = settings['genetic_algorithm']
+    ga['rotation_angles'] = angles
+    ga['seed'] = seed
+    times = []
+    for _ in range(max(1, repeat)):
+        result, seconds = _nest(parts, sheets, settings)
+        times.append(seconds)
+    tracemalloc.start()
+    try:
+        _nest(parts, sheets, settings)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall = min(times)
+    generations = ga['generations'] * len(result['sheets'])
+    cache = result.get('stats', {}).get('fitness_cache', {})
+    # Every scored individual is one cache lookup
+    evaluations = cache.get('hits', 0) + cache.get('misses', 0)
+    if not evaluations:
+        evaluations = ga['population_size'] * (ga['generations'] + 1) * len(result['sheets'])
+    return {
+        'instance': name,
+        'parts': sum(p.get('quantity', 1) for p in parts),
+        'distinct_parts': len(parts),
+        'sheets_used': len(result['sheets']),
+        'unplaced': len(result['unplaced']),
+        'wall_time': wall,
+        'wall_times': times,
+        'generations': generations,
+        'generations_per_s': generations / wall if wall else 0.0,
+        'evaluations': evaluations,
+        'evaluations_per_s': evaluations / wall if wall else 0.0,
+        'peak_memory_mb': peak / 2 ** 20,
+        'utilization': result['efficiency'],
+        'valid': result.get('valid'),
+    }
+
+
+def _revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(names=None, settings=None, repeat=3, seed=SEED):
+    """Benchmark several instances; returns the JSON-ready report."""
+    return {
+        'revision': _revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'shapely': shapely.__version__,
+        'machine': platform.machine(),
+        'seed': seed,
+        'settings': settings or BENCH_SETTINGS,
+        'results': [run_instance(name, settings, repeat, seed) for name in (names or INSTANCES)],
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    """
+    Regressions of `current` against `baseline` (two run() reports): wall
+    time up or utilization down by more than `tolerance`, relative.
+    Returns a list of human-readable lines, empty if nothing regressed.
+    """
+    before = {r['instance']: r for r in baseline['results']}
+    lines = []
+    for r in current['results']:
+        old = before.get(r['instance'])
+        if old is None:
+            continue
+        if r['wall_time'] > old['wall_time'] * (1 + tolerance):
+            lines.append(f"{r['instance']}: wall time {old['wall_time']:.3f} s -> {r['wall_time']:.3f} s")
+        if r['utilization'] < old['utilization'] * (1 - tolerance):
+            lines.append(f"{r['instance']}: utilization {old['utilization']:.2%} -> {r['utilization']:.2%}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the nesting engine.')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='results file (JSON)')
+    parser.add_argument('-i', '--instance', action='append', choices=sorted(INSTANCES),
+                        help='instance to run (repeatable; default all)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timed runs per instance')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    args = parser.parse_args(argv)
+
+    report = run(args.instance, repeat=args.repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    for r in report['results']:
+        print(f"{r['instance']:>16}: {r['wall_time']:7.3f} s  {r['generations_per_s']:8.1f} gen/s  "
+              f"{r['evaluations_per_s']:9.0f} eval/s  {r['peak_memory_mb']:7.1f} MB  "
+              f"utilization {r['utilization']:.2%}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(json.load(f), report)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
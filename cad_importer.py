@@ -2,16 +2,16 @@
 # نسخة مصححة بالكامل - تدعم جميع أشكال DXF بدون أخطاء
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
-                           QListWidget, QGraphicsView, QGraphicsScene, QTableWidget, 
+                           QListWidget, QGraphicsScene, QTableWidget, 
                            QTableWidgetItem, QTextEdit, QFrame, QComboBox, QCheckBox,
                            QProgressBar, QLabel, QMessageBox, QFileDialog, QSplitter,
                            QGroupBox, QFormLayout, QSpinBox)
 from PyQt6.QtCore import Qt, pyqtSignal, QThread
-from PyQt6.QtGui import QPen, QBrush, QColor
+from PyQt6.QtGui import QBrush, QColor
 import os
 import sys
-from shapely.geometry import MultiPolygon, MultiLineString, Polygon, LineString, Point
-from core.cad_importer import CADImporter
+from core.cad_importer import import_files
+from ui.rendering import GeometryView, PathCache, cosmetic_pen, draw_parts
 
 class ImportWorker(QThread):
     """مؤشر ترابط لاستيراد ملفات CAD في الخلفية"""
@@ -20,48 +20,48 @@ class ImportWorker(QThread):
     import_finished = pyqtSignal(list)  # جميع الأجزاء المستوردة
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, filepaths):
+    def __init__(self, filepaths, workers=None, settings=None, cache_dir=None):
         super().__init__()
         self.filepaths = filepaths
+        self.workers = workers
+        self.settings = settings
+        self.cache_dir = cache_dir
         self.all_parts = []
 
     def run(self):
-        total_files = len(self.filepaths)
-        
-        for i, filepath in enumerate(self.filepaths):
-            try:
-                # تحديث التقدم
-                progress = int((i / total_files) * 100)
-                self.progress_updated.emit(progress)
-                
-                # استيراد الملف
-                importer = CADImporter(filepath)
-                parts = importer.import_parts()
-                
+        # التقدم يقاس بالبايتات المعالجة وليس بعدد الملفات
+        sizes = {fp: os.path.getsize(fp) if os.path.exists(fp) else 0 for fp in self.filepaths}
+        total_bytes = sum(sizes.values()) or 1
+        done_bytes = 0
+
+        # تحليل الملفات في مجموعة عمليات، والنتائج تصل فور انتهاء كل ملف
+        for filepath, parts, error in import_files(self.filepaths, self.workers, self.settings, self.cache_dir):
+            done_bytes += sizes[filepath]
+            if error is not None:
+                self.error_occurred.emit(f"Error importing {os.path.basename(filepath)}: {error}")
+            else:
                 # إضافة معلومات إضافية
                 for part in parts:
                     part['source_file'] = os.path.basename(filepath)
-                
                 self.all_parts.extend(parts)
                 self.file_processed.emit(os.path.basename(filepath), parts)
-                
-            except Exception as e:
-                error_msg = f"Error importing {os.path.basename(filepath)}: {str(e)}"
-                self.error_occurred.emit(error_msg)
-                continue
-        
+            self.progress_updated.emit(int(done_bytes * 100 / total_bytes))
+
         self.progress_updated.emit(100)
         self.import_finished.emit(self.all_parts)
 
 class CadImporterDialog(QDialog):
     """حوار متقدم لاستيراد ملفات CAD - نسخة مصححة ومحسنة"""
     
-    def __init__(self, filepath_list, parent=None):
+    def __init__(self, filepath_list, parent=None, cache_dir=None):
         super().__init__(parent)
         self.filepaths = filepath_list
+        self.cache_dir = cache_dir
         self.imported_parts = []
         self.filtered_parts = []
         self.worker = None
+        # مسارات الرسم لكل شكل، تُبنى مرة واحدة وتُعاد في كل معاينة
+        self.path_cache = PathCache()
         
         self.setWindowTitle('Import CAD Files - Professional')
         self.setMinimumSize(1400, 900)
@@ -190,7 +190,7 @@ class CadImporterDialog(QDialog):
 
         # معاينة الملف الخام
         layout.addWidget(QLabel("Raw DXF Content:"))
-        self.raw_view = QGraphicsView()
+        self.raw_view = GeometryView()
         self.raw_scene = QGraphicsScene()
         self.raw_view.setScene(self.raw_scene)
         self.raw_view.setMinimumHeight(200)
@@ -198,7 +198,7 @@ class CadImporterDialog(QDialog):
 
         # معاينة الأجزاء المعالجة
         layout.addWidget(QLabel("Processed Parts:"))
-        self.processed_view = QGraphicsView()
+        self.processed_view = GeometryView()
         self.processed_scene = QGraphicsScene()
         self.processed_view.setScene(self.processed_scene)
         self.processed_view.setMinimumHeight(200)
@@ -264,7 +264,7 @@ class CadImporterDialog(QDialog):
         self.imported_parts.clear()
 
         # إنشاء وبدء العامل
-        self.worker = ImportWorker(self.filepaths)
+        self.worker = ImportWorker(self.filepaths, settings=self._import_settings(), cache_dir=self.cache_dir)
         self.worker.progress_updated.connect(self.progress_bar.setValue)
         self.worker.file_processed.connect(self._on_file_processed)
         self.worker.import_finished.connect(self._on_import_finished)
@@ -274,6 +274,20 @@ class CadImporterDialog(QDialog):
         self.status_label.setText("Importing...")
         self.log_text.append(f"Starting import of {len(self.filepaths)} files...")
 
+    def _import_settings(self):
+        """إعدادات الاستيراد الحالية، وهي جزء من مفتاح ذاكرة التخزين المؤقت"""
+        layer_actions = {}
+        for row in range(self.layers_table.rowCount()):
+            combo = self.layers_table.cellWidget(row, 2)
+            if combo is not None:
+                layer_actions[self.layers_table.item(row, 0).text()] = combo.currentText()
+        return {
+            'units': self.units_combo.currentText(),
+            'scale': self.scale_factor.value(),
+            'close_open_paths': self.close_open_paths.isChecked(),
+            'layer_actions': layer_actions,
+        }
+
     def _on_file_processed(self, filename, parts):
         """معالجة نتائج استيراد ملف واحد"""
         self.log_text.append(f"Processed {filename}: {len(parts)} parts found")
@@ -356,93 +370,21 @@ class CadImporterDialog(QDialog):
         self.raw_scene.clear()
         self.processed_scene.clear()
 
-        # رسم الأجزاء
-        y_offset = 0
-        for part in parts:
-            geom = part.get('geometry')
-            if geom:
-                self._draw_geometry_safe(self.raw_scene, geom, y_offset)
-                self._draw_geometry_safe(self.processed_scene, geom, y_offset, processed=True)
-                y_offset += 150
+        # رسم الأجزاء في صفوف، كل شكل عنصر واحد بمسار مخزن مؤقتاً
+        geoms = [part['geometry'] for part in parts if part.get('geometry') is not None and not part['geometry'].is_empty]
+        draw_parts(self.raw_scene, self.path_cache, geoms,
+                   cosmetic_pen(QColor(100, 100, 100)), QBrush(QColor(100, 100, 100, 30)))
+        draw_parts(self.processed_scene, self.path_cache, geoms,
+                   cosmetic_pen(QColor(0, 150, 0), 2), QBrush(QColor(0, 150, 0, 50)))
 
         # تعديل النطاق ليعرض كل شيء
-        self.raw_view.fitInView(self.raw_scene.itemsBoundingRect(), Qt.AspectRatioMode.KeepAspectRatio)
-        self.processed_view.fitInView(self.processed_scene.itemsBoundingRect(), Qt.AspectRatioMode.KeepAspectRatio)
+        self.raw_view.fit()
+        self.processed_view.fit()
 
     def _preview_all_parts(self):
         """معاينة جميع الأجزاء المستوردة"""
-        self._preview_parts(self.imported_parts[:10])  # أول 10 أجزاء للأداء
-
-    def _draw_geometry_safe(self, scene, geom, y_offset=0, processed=False):
-        """رسم الهندسة بطريقة آمنة - يدعم جميع أنواع shapely"""
-        try:
-            if geom is None or geom.is_empty:
-                return
-
-            # اختيار الألوان
-            if processed:
-                pen = QPen(QColor(0, 150, 0), 2)  # أخضر للمعالج
-                brush = QBrush(QColor(0, 150, 0, 50))
-            else:
-                pen = QPen(QColor(100, 100, 100), 1)  # رمادي للخام
-                brush = QBrush(QColor(100, 100, 100, 30))
-
-            # معالجة الهندسات المتعددة
-            if isinstance(geom, (MultiPolygon, MultiLineString)):
-                for sub_geom in geom.geoms:
-                    self._draw_geometry_safe(scene, sub_geom, y_offset, processed)
-                return
-
-            # رسم الأشكال المفردة
-            if isinstance(geom, Polygon):
-                self._draw_polygon(scene, geom, pen, brush, y_offset)
-            elif isinstance(geom, LineString):
-                self._draw_linestring(scene, geom, pen, y_offset)
-            elif isinstance(geom, Point):
-                self._draw_point(scene, geom, pen, brush, y_offset)
-
-        except Exception as e:
-            # في حالة خطأ، ارسم مستطيل بسيط
-            bounds = geom.bounds if hasattr(geom, 'bounds') else (0, 0, 10, 10)
-            scene.addRect(bounds[0], bounds[1] + y_offset, 
-                         bounds[2] - bounds[0], bounds[3] - bounds[1], 
-                         QPen(QColor(255, 0, 0), 1))
-
-    def _draw_polygon(self, scene, polygon, pen, brush, y_offset):
-        """رسم مضلع"""
-        if polygon.exterior:
-            coords = list(polygon.exterior.coords)
-            if len(coords) >= 3:
-                # تحويل النقاط
-                points = [(x, y + y_offset) for x, y in coords]
-                
-                # رسم الحدود الخارجية
-                for i in range(len(points) - 1):
-                    x1, y1 = points[i]
-                    x2, y2 = points[i + 1]
-                    scene.addLine(x1, y1, x2, y2, pen)
-                
-                # رسم الثقوب الداخلية إن وجدت
-                for interior in polygon.interiors:
-                    hole_coords = list(interior.coords)
-                    hole_points = [(x, y + y_offset) for x, y in hole_coords]
-                    for i in range(len(hole_points) - 1):
-                        x1, y1 = hole_points[i]
-                        x2, y2 = hole_points[i + 1]
-                        scene.addLine(x1, y1, x2, y2, QPen(QColor(255, 100, 100), 1))
-
-    def _draw_linestring(self, scene, linestring, pen, y_offset):
-        """رسم خط"""
-        coords = list(linestring.coords)
-        for i in range(len(coords) - 1):
-            x1, y1 = coords[i]
-            x2, y2 = coords[i + 1]
-            scene.addLine(x1, y1 + y_offset, x2, y2 + y_offset, pen)
-
-    def _draw_point(self, scene, point, pen, brush, y_offset):
-        """رسم نقطة"""
-        x, y = point.x, point.y
-        scene.addEllipse(x - 2, y + y_offset - 2, 4, 4, pen, brush)
+        # مستوى التفاصيل يتبع التكبير، فلا حاجة لتحديد عدد الأجزاء
+        self._preview_parts(self.imported_parts)
 
     def get_imported_parts(self):
         """إرجاع الأجزاء المستوردة للاستخدام الخارجي"""
@@ -0,0 +1,134 @@
+# core/collision.py
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.affinity import rotate, translate
+from shapely.geometry import box
+
+from core.geometry_levels import DEFAULT_TOLERANCE, PartLevels, part_geometry
+from core.instrumentation import timed
+from core.nfp import NFPEngine
+from core.rotations import RotationTable
+
+
+def box_pairs(lo, hi):
+    """
+    Broad phase over axis-aligned boxes by sweep and prune along x.
+
+    lo, hi: (P, N, 2) box corners for P independent layouts. Rows are laid
+    side by side on the x axis so one sort covers the whole batch. Returns
+    (row, i, j) index arrays with one entry per pair of boxes whose
+    interiors overlap.
+    """
+    lo = np.asarray(lo, dtype=float)
+    hi = np.asarray(hi, dtype=float)
+    n_pop, n = lo.shape[:2]
+    if n < 2 or n_pop == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, empty
+    span = hi[..., 0].max() - lo[..., 0].min() + 1.0
+    shift = np.arange(n_pop)[:, None] * span
+    x0 = (lo[..., 0] + shift).ravel()
+    x1 = (hi[..., 0] + shift).ravel()
+    order = np.argsort(x0, kind='stable')
+    x0_sorted = x0[order]
+    # Boxes after k in sweep order that start before k ends
+    end = np.searchsorted(x0_sorted, x1[order], side='left')
+    counts = np.maximum(end - np.arange(len(order)) - 1, 0)
+    first = np.repeat(np.arange(len(order)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    a, b = order[first], order[first + 1 + offsets]
+    row, i, j = a // n, a % n, b % n
+    flat_lo, flat_hi = lo.reshape(-1, 2), hi.reshape(-1, 2)
+    keep = ((flat_lo[a, 1] < flat_hi[b, 1]) & (flat_lo[b, 1] < flat_hi[a, 1])
+            & (flat_lo[a, 0] < flat_hi[b, 0]) & (flat_lo[b, 0] < flat_hi[a, 0]))
+    return row[keep], i[keep], j[keep]
+
+
+def place(geom, angle, pos):
+    """
+    Put a geometry where a gene says: rotated about the origin, then shifted
+    so its rotated bounding box starts at `pos` (the GA frame). Returns the
+    placed geometry and the (angle, dx, dy) pose that produced it.
+    """
+    rotated = rotate(geom, angle, origin=(0, 0)) if angle else geom
+    minx, miny, _, _ = rotated.bounds
+    dx, dy = pos[0] - minx, pos[1] - miny
+    return translate(rotated, dx, dy), (angle, dx, dy)
+
+
+def find_collisions(geometries, spacing=0.0, outlines=None, eps=1e-6, candidates=None):
+    """
+    Bulk all-pairs narrow phase for one layout: (i, j) pairs of placed
+    geometries that overlap or come closer than `spacing`.
+
+    Candidates come from a single STRtree query over `outlines` (coarse,
+    conservative shapes such as PartLevels outlines; the geometries
+    themselves if omitted), unless given as `candidates`, (i, j) index
+    arrays with i < j. GEOS prepares the tree side, and the exact test
+    then runs vectorized on the candidate pairs only.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    if len(geometries) < 2:
+        return []
+    if candidates is not None:
+        a, b = (np.asarray(c, dtype=np.intp) for c in candidates)
+    else:
+        coarse = geometries if outlines is None else np.asarray(outlines, dtype=object)
+        if outlines is None and spacing > 0:
+            a, b = STRtree(coarse).query(coarse, predicate='dwithin', distance=spacing)
+        else:
+            a, b = STRtree(coarse).query(coarse, predicate='intersects')
+        keep = a < b
+        a, b = a[keep], b[keep]
+    if spacing > 0:
+        hit = shapely.distance(geometries[a], geometries[b]) < spacing - eps
+    else:
+        hit = shapely.area(shapely.intersection(geometries[a], geometries[b])) > eps
+    return list(zip(a[hit].tolist(), b[hit].tolist()))
+
+
+@timed('collision.validate')
+def validate_layout(genes, sheet, spacing=0.0, margin=0.0, tolerance=DEFAULT_TOLERANCE, eps=1e-3, nfp_cache=None):
+    """
+    Check a finished layout (genes as from core.genome.to_genes) at full
+    resolution. Returns {'collisions': [(i, j), ...], 'outside': [i, ...]}
+    with indices into `genes`; both empty means the layout can be cut.
+
+    With an `nfp_cache` (core.nfp.NFPCache), pairs whose outline boxes
+    meet are screened by looking their offset up in the pair's no-fit
+    polygon, served from the cache, instead of intersecting the outlines.
+    """
+    # Each distinct part and angle is rotated once, then only shifted
+    index, distinct, shapes = {}, [], []
+    for gene in genes:
+        if id(gene['part']) not in index:
+            index[id(gene['part'])] = len(shapes)
+            distinct.append(gene['part'])
+            shapes.append(PartLevels(part_geometry(gene['part']), spacing, tolerance))
+    angles = sorted({float(gene['angle']) for gene in genes})
+    full = RotationTable([levels.full for levels in shapes], angles)
+    coarse = RotationTable([levels.outline for levels in shapes], angles)
+    parts = np.array([index[id(gene['part'])] for gene in genes], dtype=np.intp)
+    rot = np.array([full.index(gene['angle']) for gene in genes], dtype=np.intp)
+    pos = np.array([gene['pos'] for gene in genes], dtype=float).reshape(-1, 2)
+    placed = full.place_many(parts, rot, pos)
+    # Outlines keep the pose of the full geometry they surround
+    shift = pos - full.bounds[rot, parts, :2] + coarse.bounds[rot, parts, :2]
+    if nfp_cache is None or len(genes) < 2:
+        collisions = find_collisions(placed, spacing, coarse.place_many(parts, rot, shift), eps)
+    else:
+        engine = NFPEngine(distinct, angles, nfp_cache, spacing, tolerance, shapes)
+        size = coarse.sizes[rot, parts]
+        _, a, b = box_pairs(shift[None], (shift + size)[None])
+        a, b = np.minimum(a, b), np.maximum(a, b)
+        hit = engine.overlapping(parts[a], np.take(angles, rot[a]), parts[b], np.take(angles, rot[b]), pos[b] - pos[a])
+        collisions = find_collisions(placed, spacing, eps=eps, candidates=(a[hit], b[hit]))
+    usable = box(margin, margin, sheet['width'] - margin, sheet['height'] - margin).buffer(eps)
+    shapely.prepare(usable)
+    inside = shapely.contains(usable, placed)
+    return {
+        'collisions': collisions,
+        'outside': np.flatnonzero(~inside).tolist(),
+    }
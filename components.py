@@ -48,8 +48,12 @@ class MainWindow(QMainWindow):
 
     def _create_tabs(self):
         tabs_widget = QTabWidget()
-        tabs_widget.addTab(PartsTab(self.settings, self), 'Parts')
-        tabs_widget.addTab(SheetsTab(self.settings), 'Sheets')
-        tabs_widget.addTab(NestingTab(self.settings), 'Nesting')
-        tabs_widget.addTab(ExportTab(self.settings), 'Export')
+        self.parts_tab = PartsTab(self.settings, self)
+        self.sheets_tab = SheetsTab(self.settings)
+        self.nesting_tab = NestingTab(self.settings, self)
+        self.export_tab = ExportTab(self.settings)
+        tabs_widget.addTab(self.parts_tab, 'Parts')
+        tabs_widget.addTab(self.sheets_tab, 'Sheets')
+        tabs_widget.addTab(self.nesting_tab, 'Nesting')
+        tabs_widget.addTab(self.export_tab, 'Export')
         self.setCentralWidget(tabs_widget)
@@ -0,0 +1,305 @@
+# core/contours.py
+
+import math
+from array import array
+
+import numpy as np
+import shapely
+from ezdxf import path as dxf_path
+from shapely import STRtree
+from shapely.geometry import Polygon
+
+DEFAULT_CHORD_TOLERANCE = 0.01
+DEFAULT_SNAP_TOLERANCE = 0.01
+CURVED_TYPES = ('ARC', 'CIRCLE', 'ELLIPSE', 'SPLINE')
+
+
+def flatten_entity(entity, tolerance=DEFAULT_CHORD_TOLERANCE):
+    """
+    Outline of one DXF entity as (points, closed), or None if the entity
+    has no outline. Points are a list of (x, y) or an (n, 2) array.
+    Curves (arcs, circles, ellipses, splines and bulged polyline segments)
+    are flattened adaptively: no chord strays more than `tolerance` from
+    the true curve, so large radii get many segments and small fillets
+    only a few.
+    """
+    et = entity.dxftype()
+    if et == 'LINE':
+        s, e = entity.dxf.start, entity.dxf.end
+        return [(s.x, s.y), (e.x, e.y)], False
+    if et == 'LWPOLYLINE' and not entity.has_arc:
+        # Straight polylines are by far the most common; take their packed
+        # vertex array (x, y, start width, end width, bulge) as it is
+        points = entity.lwpoints
+        xy = np.asarray(points.values, dtype=float).reshape(-1, points.VERTEX_SIZE)[:, :2]
+        return xy, bool(entity.closed)
+    if et in CURVED_TYPES or et in ('LWPOLYLINE', 'POLYLINE'):
+        path = dxf_path.make_path(entity)
+        points = [(v.x, v.y) for v in path.flattening(tolerance)]
+        if len(points) < 2:
+            return None
+        closed = path.is_closed or et == 'CIRCLE'
+        if closed and len(points) > 2 and math.dist(points[0], points[-1]) <= tolerance:
+            points.pop()
+        return points, closed
+    return None
+
+
+class OutlineBuffer:
+    """
+    Flattened outlines packed into one preallocated (n, 2) float64
+    coordinate array, with compact per-outline offsets, closed flags and
+    layer ids. The array doubles when full, so appending stays amortized
+    constant time and a vertex costs 16 bytes instead of a Python tuple.
+    Items are (coordinate view, closed), as reconstruct() expects.
+    """
+    def __init__(self, capacity=4096):
+        self.coords = np.empty((max(int(capacity), 16), 2))
+        self.size = 0
+        # Outline k is coords[starts[k]:starts[k + 1]]
+        self.starts = array('q', [0])
+        self.closed = bytearray()
+        self.layer_ids = array('i')
+        self.layer_names = []
+        self._layer_index = {}
+
+    def append(self, points, closed, layer='0'):
+        end = self.size + len(points)
+        if end > len(self.coords):
+            grown = np.empty((max(end, 2 * len(self.coords)), 2))
+            grown[:self.size] = self.coords[:self.size]
+            self.coords = grown
+        self.coords[self.size:end] = points
+        self.size = end
+        self.starts.append(end)
+        self.closed.append(1 if closed else 0)
+        index = self._layer_index.get(layer)
+        if index is None:
+            index = self._layer_index[layer] = len(self.layer_names)
+            self.layer_names.append(layer)
+        self.layer_ids.append(index)
+
+    def scale(self, factor):
+        self.coords[:self.size] *= factor
+
+    def layer(self, k):
+        return self.layer_names[self.layer_ids[k]]
+
+    def __len__(self):
+        return len(self.closed)
+
+    def __getitem__(self, k):
+        return self.coords[self.starts[k]:self.starts[k + 1]], bool(self.closed[k])
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+
+class EndpointSnapper:
+    """
+    Spatial hash merging endpoints that lie within `tolerance` of each
+    other into one graph node. Each lookup touches the 3x3 cells around the
+    point, so snapping stays linear in the number of endpoints.
+    """
+    def __init__(self, tolerance=DEFAULT_SNAP_TOLERANCE):
+        self.tolerance = max(float(tolerance), 1e-12)
+        self.cells = {}
+        self.nodes = []
+        # Drawings mostly repeat endpoints bit for bit; look those up directly
+        self.exact = {}
+
+    def node(self, x, y):
+        n = self.exact.get((x, y))
+        if n is not None:
+            return n
+        n = self._nearest(x, y)
+        self.exact[(x, y)] = n
+        return n
+
+    def _nearest(self, x, y):
+        cx, cy = math.floor(x / self.tolerance), math.floor(y / self.tolerance)
+        best, best_d = None, self.tolerance * self.tolerance
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for n in self.cells.get((i, j), ()):
+                    nx, ny = self.nodes[n]
+                    d = (nx - x) ** 2 + (ny - y) ** 2
+                    if d <= best_d:
+                        best, best_d = n, d
+        if best is not None:
+            return best
+        self.nodes.append((x, y))
+        self.cells.setdefault((cx, cy), []).append(len(self.nodes) - 1)
+        return len(self.nodes) - 1
+
+
+def chain_paths(paths, tolerance=DEFAULT_SNAP_TOLERANCE):
+    """
+    Chain open point paths into closed rings through their snapped
+    endpoints. Returns (rings, leftover) where each ring is (coords, path
+    indices) and leftover lists the paths that did not close.
+    """
+    snapper = EndpointSnapper(tolerance)
+    ends = []
+    at = {}
+    for k, points in enumerate(paths):
+        a, b = snapper.node(*points[0]), snapper.node(*points[-1])
+        ends.append((a, b))
+        at.setdefault(a, []).append(k)
+        at.setdefault(b, []).append(k)
+
+    used = [False] * len(paths)
+    rings, leftover = [], []
+    for k in range(len(paths)):
+        if used[k]:
+            continue
+        used[k] = True
+        start, node = ends[k]
+        coords = list(paths[k])
+        members = [k]
+        while node != start:
+            nxt = next((m for m in at[node] if not used[m]), None)
+            if nxt is None:
+                break
+            used[nxt] = True
+            members.append(nxt)
+            a, b = ends[nxt]
+            points = paths[nxt] if a == node else paths[nxt][::-1]
+            coords.extend(points[1:])
+            node = b if a == node else a
+        if node == start and len(coords) >= 4:
+            # Close exactly on the snapped start point
+            coords[-1] = coords[0]
+            rings.append((coords, members))
+        else:
+            leftover.extend(members)
+    return rings, leftover
+
+
+def _polygons(rings):
+    # Build all shells in one vectorized call; repair only the invalid ones
+    counts = [len(r) for r in rings]
+    coords = np.concatenate([np.asarray(r, dtype=float) for r in rings])
+    polygons = shapely.polygons(shapely.linearrings(coords, indices=np.repeat(np.arange(len(rings)), counts)))
+    for k in np.flatnonzero(~shapely.is_valid(polygons)):
+        fixed = polygons[k].buffer(0)
+        if fixed.geom_type == 'MultiPolygon':
+            fixed = max(fixed.geoms, key=lambda p: p.area)
+        polygons[k] = fixed if fixed.geom_type == 'Polygon' else Polygon()
+    return polygons
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size."""
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return i
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        return i
+
+    def groups(self):
+        """Members of every set, each list in ascending order."""
+        found = {}
+        for i in range(len(self.parent)):
+            found.setdefault(self.find(i), []).append(i)
+        return list(found.values())
+
+
+def _merge_overlapping(polygons):
+    # Rings that overlap or repeat each other outline one part between them
+    a, b = STRtree(polygons).query(polygons, predicate='intersects')
+    pair = a < b
+    a, b = a[pair], b[pair]
+    same = shapely.overlaps(polygons[a], polygons[b]) | shapely.equals(polygons[a], polygons[b])
+    sets = UnionFind(len(polygons))
+    for i, j in zip(a[same].tolist(), b[same].tolist()):
+        sets.union(i, j)
+    members = sets.groups()
+    merged = np.empty(len(members), dtype=object)
+    for k, group in enumerate(members):
+        if len(group) == 1:
+            merged[k] = polygons[group[0]]
+        else:
+            merged[k] = Polygon(shapely.union_all(polygons[group]).exterior)
+    return merged, [group[0] for group in members]
+
+
+def nest_rings(rings):
+    """
+    Separate closed rings into parts: polygons with holes.
+
+    Rings that overlap or duplicate one another are first merged into one
+    outline, as when a part is drawn twice or from overlapping pieces. An
+    outline inside an odd number of others is then a hole of the outline
+    directly around it, and joins that outline's set in a union-find;
+    outlines at even depth are parts of their own, including parts drawn
+    inside a hole. Both steps only test the candidate pairs an STRtree
+    returns, so a plate of hundreds of parts stays O(n log n).
+    Returns a list of (polygon, ring index of its outer contour).
+    """
+    if not rings:
+        return []
+    polygons = _polygons(rings)
+    keep = np.flatnonzero(shapely.area(polygons) > 0)
+    polygons = polygons[keep]
+    if not len(polygons):
+        return []
+    polygons, first = _merge_overlapping(polygons)
+    inner, outer = STRtree(polygons).query(polygons, predicate='contains_properly')[::-1]
+    depth = np.bincount(inner, minlength=len(polygons))
+    # Containment nests, so the direct parent is the container one level up
+    direct = (depth[outer] == depth[inner] - 1) & (depth[inner] % 2 == 1)
+    parts = UnionFind(len(polygons))
+    for hole, shell in zip(inner[direct].tolist(), outer[direct].tolist()):
+        parts.union(shell, hole)
+
+    result = []
+    for group in parts.groups():
+        shell = next(i for i in group if depth[i] % 2 == 0)
+        holes = [polygons[i].exterior.coords for i in group if i != shell]
+        polygon = Polygon(polygons[shell].exterior.coords, holes) if holes else polygons[shell]
+        result.append((polygon, int(keep[first[shell]])))
+    # Order of the outer contours in the drawing, as before separation
+    result.sort(key=lambda item: item[1])
+    return result
+
+
+def reconstruct(outlines, tolerance=DEFAULT_SNAP_TOLERANCE):
+    """
+    Rebuild part contours from flattened entity outlines [(points, closed)]
+    (a list or an OutlineBuffer). Closed outlines are rings as they are;
+    open ones are chained through snapped endpoints. Returns a list of
+    (polygon, index of the outline its outer contour starts with).
+    """
+    rings, sources = [], []
+    open_paths, open_index = [], []
+    for k, (points, closed) in enumerate(outlines):
+        if closed and len(points) >= 3:
+            ring = np.asarray(points, dtype=float)
+            rings.append(np.concatenate([ring, ring[:1]]))
+            sources.append(k)
+        elif len(points) >= 2:
+            # Plain floats: the snapper hashes and compares them one by one
+            open_paths.append(np.asarray(points, dtype=float).tolist())
+            open_index.append(k)
+    chained, _ = chain_paths(open_paths, tolerance)
+    for coords, members in chained:
+        rings.append(coords)
+        sources.append(open_index[members[0]])
+    return [(polygon, sources[k]) for polygon, k in nest_rings(rings)]
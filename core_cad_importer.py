@@ -0,0 +1,191 @@
+# core/cad_importer.py
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ezdxf
+from ezdxf.addons import iterdxf
+from shapely.geometry import LineString, Polygon
+
+from core.contours import CURVED_TYPES, OutlineBuffer, flatten_entity, reconstruct
+from core.import_cache import ImportCache, part_names
+from core.instrumentation import active, count, span, traced_call
+
+# Drawing units to millimetres
+UNIT_SCALE = {'mm': 1.0, 'cm': 10.0, 'm': 1000.0, 'inches': 25.4}
+DEFAULT_SETTINGS = {
+    'units': 'mm',
+    'scale': 1.0,
+    'close_open_paths': False,
+    'layer_actions': {},  # layer name -> 'Import' | 'Skip' | 'Combine'
+    'chord_tolerance': 0.01,  # max curve-to-chord distance, mm
+    'snap_tolerance': 0.01,  # endpoints closer than this join, mm
+    'streaming': 'auto',  # True | False | 'auto' (files over STREAM_THRESHOLD)
+}
+# Larger files are read entity by entity instead of as a whole document
+STREAM_THRESHOLD = 32 * 2 ** 20
+OUTLINE_TYPES = ('LINE', 'LWPOLYLINE', 'POLYLINE') + CURVED_TYPES
+# Rough DXF bytes per flattened vertex, to size the coordinate buffer
+BYTES_PER_VERTEX = 48
+
+
+def import_settings(settings=None):
+    """Import settings with defaults filled in; also the cache key input."""
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(settings or {})
+    return merged
+
+
+class CADImporter:
+    """
+    Reads a DXF file into shapely geometries, without any GUI dependency.
+
+    `import_file()` returns one geometry per supported entity; closed
+    outlines become polygons and open ones line strings.
+    `import_parts()` rebuilds the part contours, holes included, from those
+    outlines (see core.contours). `settings` (see DEFAULT_SETTINGS) sets
+    drawing units and scale, curve and snapping tolerances, whether open
+    polylines are closed, and which layers are skipped.
+
+    Outlines land in `self.outlines`, an OutlineBuffer of flat coordinate
+    arrays. Large files are streamed in a single pass with ezdxf's iterdxf
+    add-on, so the document itself is never held in memory.
+    """
+    def __init__(self, filepath, settings=None):
+        self.filepath = filepath
+        self.settings = import_settings(settings)
+        self.outlines = OutlineBuffer()
+
+    def streaming(self):
+        """Whether this file is read entity by entity (see the 'streaming' setting)."""
+        mode = self.settings['streaming']
+        if mode == 'auto':
+            return os.path.getsize(self.filepath) > STREAM_THRESHOLD
+        return bool(mode)
+
+    def _entities(self):
+        if self.streaming():
+            # One forward pass; each entity is dropped once flattened
+            return iterdxf.modelspace(self.filepath, types=OUTLINE_TYPES)
+        with span('import.read'):
+            doc = ezdxf.readfile(self.filepath)
+        return doc.modelspace()
+
+    def read_outlines(self):
+        """Flatten every entity into `self.outlines`; returns the buffer."""
+        self.outlines = OutlineBuffer(os.path.getsize(self.filepath) // BYTES_PER_VERTEX)
+        skipped = {layer for layer, action in self.settings['layer_actions'].items() if action == 'Skip'}
+        factor = UNIT_SCALE.get(self.settings['units'], 1.0) * float(self.settings['scale'])
+        # Flatten in drawing units so the tolerance holds after scaling
+        tolerance = float(self.settings['chord_tolerance']) / factor
+        close_open = self.settings['close_open_paths']
+        entities = self._entities()
+        with span('import.flatten'):
+            for entity in entities:
+                layer = entity.dxf.get('layer', '0')
+                if layer in skipped:
+                    continue
+                outline = flatten_entity(entity, tolerance)
+                if outline is None:
+                    continue
+                points, closed = outline
+                if close_open and entity.dxftype() in ('LWPOLYLINE', 'POLYLINE'):
+                    closed = True
+                self.outlines.append(points, closed and len(points) >= 3, layer)
+        if factor != 1.0:
+            self.outlines.scale(factor)
+        count('import.outlines', len(self.outlines))
+        return self.outlines
+
+    def import_file(self):
+        self.read_outlines()
+        return [Polygon(points) if closed else LineString(points) for points, closed in self.outlines]
+
+    def import_parts(self):
+        """
+        Part dicts (geometry, name, width, height, area, layer) for every
+        reconstructed contour. Geometry is the true outline with its holes;
+        drawings without any closed contour yield no parts.
+        """
+        self.read_outlines()
+        with span('import.reconstruct'):
+            outlines = [(polygon, self.outlines.layer(k))
+                        for polygon, k in reconstruct(self.outlines, self.settings['snap_tolerance'])]
+        parts = []
+        for (geom, layer), name in zip(outlines, part_names(self.filepath, len(outlines))):
+            minx, miny, maxx, maxy = geom.bounds
+            parts.append({
+                'geometry': geom,
+                'name': name,
+                'width': maxx - minx,
+                'height': maxy - miny,
+                'area': geom.area,
+                'layer': layer,
+            })
+        return parts
+
+
+def _import_one(filepath, settings=None):
+    # Module-level so it can run in a worker process
+    try:
+        with span('import.file', file=os.path.basename(filepath)):
+            return filepath, CADImporter(filepath, settings).import_parts(), None
+    except Exception as e:
+        return filepath, [], str(e)
+
+
+def _import_many(filepaths, workers, settings):
+    if workers == 1 or len(filepaths) < 2:
+        for filepath in filepaths:
+            yield _import_one(filepath, settings)
+        return
+    ordered = sorted(filepaths, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0, reverse=True)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(filepaths)),
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as pool:
+        recorder = active()
+        if recorder is None:
+            futures = [pool.submit(_import_one, filepath, settings) for filepath in ordered]
+        else:
+            futures = [pool.submit(traced_call, _import_one, filepath, settings) for filepath in ordered]
+        for future in as_completed(futures):
+            if recorder is None:
+                yield future.result()
+            else:
+                result, data = future.result()
+                recorder.merge(data)
+                yield result
+
+
+def import_files(filepaths, workers=None, settings=None, cache_dir=None):
+    """
+    Import many DXF files in a process pool, yielding (filepath, parts,
+    error) for each file as soon as it is done. Large files are submitted
+    first so a big file picked up last does not hold up the batch.
+
+    With a `cache_dir`, files whose content and settings were imported
+    before are loaded from the ImportCache without touching ezdxf, and
+    fresh imports are added to it.
+    """
+    workers = workers or os.cpu_count() or 1
+    settings = import_settings(settings)
+    cache = ImportCache(cache_dir) if cache_dir else None
+    keys = {}
+    pending = []
+    for filepath in filepaths:
+        if cache is not None and os.path.exists(filepath):
+            with span('import.cache_get'):
+                keys[filepath] = cache.key(filepath, settings)
+                parts = cache.get(keys[filepath], filepath)
+            if parts is not None:
+                count('import.cache_hits')
+                yield filepath, parts, None
+                continue
+        pending.append(filepath)
+    for filepath, parts, error in _import_many(pending, workers, settings):
+        if error is None and filepath in keys:
+            with span('import.cache_put'):
+                cache.put(keys[filepath], parts)
+        yield filepath, parts, error
@@ -0,0 +1,151 @@
+# core/duplicates.py
+
+import math
+
+import numpy as np
+from shapely.affinity import rotate, translate
+from shapely.geometry import Polygon
+from shapely.geometry.polygon import orient
+
+from core.geometry_levels import part_geometry
+
+DEFAULT_DUPLICATE_TOLERANCE = 0.01
+# Fingerprint bins are this many tolerances wide
+BIN_STEPS = 8
+
+
+def _rings(geom):
+    if isinstance(geom, Polygon):
+        polygons = [geom]
+    else:
+        polygons = [g for g in getattr(geom, 'geoms', []) if isinstance(g, Polygon)]
+    return [ring for p in polygons for ring in (p.exterior, *p.interiors)]
+
+
+def _edges(ring):
+    coords = np.asarray(ring.coords)
+    return np.diff(coords, axis=0)
+
+
+def fingerprint(geom, tolerance=DEFAULT_DUPLICATE_TOLERANCE):
+    """
+    Coarse key of a part outline that ignores where it was drawn and how
+    it was turned: its ring count, and its perimeter and area floored onto
+    grids BIN_STEPS times coarser than `tolerance`. Float noise can still
+    put copies on either side of a bin edge, so lookups also try the
+    neighbouring bins (see neighbour_keys); same_shape() decides.
+    """
+    step = BIN_STEPS * tolerance
+    # Area to the band a `step` shift of the boundary sweeps
+    band = step * max(geom.length, tolerance)
+    return len(_rings(geom)), math.floor(geom.length / step), math.floor(geom.area / band)
+
+
+def neighbour_keys(key):
+    """The fingerprint `key` and every key one bin away from it."""
+    rings, length, area = key
+    return [(rings, length + i, area + j) for i in (-1, 0, 1) for j in (-1, 0, 1)]
+
+
+def same_shape(a, b, tolerance=DEFAULT_DUPLICATE_TOLERANCE):
+    """
+    Rotation (degrees) that turns outline `b` into `a`, or None if no
+    rotation and shift make them agree within `tolerance`. Mirror images
+    are different parts. Candidate rotations line the longest edge of `a`
+    up with each edge of `b` of the same length.
+    """
+    if not (isinstance(a, Polygon) and isinstance(b, Polygon)):
+        return 0.0 if a.equals_exact(translate(b, a.bounds[0] - b.bounds[0], a.bounds[1] - b.bounds[1]),
+                                     tolerance) else None
+    a, b = orient(a.simplify(0)), orient(b.simplify(0))
+    edges_a, edges_b = _edges(a.exterior), _edges(b.exterior)
+    lengths_a, lengths_b = np.hypot(*edges_a.T), np.hypot(*edges_b.T)
+    longest = int(lengths_a.argmax())
+    target = math.atan2(edges_a[longest, 1], edges_a[longest, 0])
+    ca, cb = a.centroid, b.centroid
+    # Area of a band `tolerance` wide along the whole boundary
+    allowed = tolerance * a.length
+    for k in np.flatnonzero(np.abs(lengths_b - lengths_a[longest]) <= tolerance):
+        angle = math.degrees(target - math.atan2(edges_b[k, 1], edges_b[k, 0]))
+        turned = rotate(b, angle, origin=cb)
+        turned = translate(turned, ca.x - cb.x, ca.y - cb.y)
+        if a.symmetric_difference(turned).area <= allowed:
+            return angle % 360
+    return None
+
+
+class DuplicateIndex:
+    """
+    Parts collected so far, identical outlines merged into one entry with a
+    `quantity`. Candidates are bucketed by fingerprint, so adding a part
+    only compares it against the few parts in its own and neighbouring
+    buckets.
+    """
+    def __init__(self, tolerance=DEFAULT_DUPLICATE_TOLERANCE):
+        self.tolerance = float(tolerance)
+        self.parts = []
+        self._buckets = {}
+
+    def add(self, part):
+        """
+        Add one part dict. Returns (entry, merged): the existing entry
+        whose quantity it was added to, or a copy of the part as a new one.
+        """
+        geom = part_geometry(part)
+        quantity = int(part.get('quantity', 1))
+        key = fingerprint(geom, self.tolerance)
+        for near in neighbour_keys(key):
+            for entry in self._buckets.get(near, ()):
+                if same_shape(part_geometry(entry), geom, self.tolerance) is not None:
+                    entry['quantity'] += quantity
+                    return entry, True
+        entry = dict(part)
+        entry['quantity'] = quantity
+        self._buckets.setdefault(key, []).append(entry)
+        self.parts.append(entry)
+        return entry, False
+
+
+def merge_duplicates(parts, tolerance=DEFAULT_DUPLICATE_TOLERANCE):
+    """Parts with identical outlines merged into one entry with a quantity."""
+    index = DuplicateIndex(tolerance)
+    for part in parts:
+        index.add(part)
+    return index.parts
+
+
+def expand_quantities(parts):
+    """
+    One list entry per copy: a part with quantity q appears q times as the
+    same dict, so copies share its geometry and everything computed from it.
+    """
+    return [part for part in parts for _ in range(int(part.get('quantity', 1)) if isinstance(part, dict) else 1)]
+
+
+def instance_groups(parts):
+    """
+    (distinct, kinds) for a list of part instances: the distinct parts in
+    order of first appearance and, per instance, the index of the part it
+    copies. Copies are recognized by identity, as expand_quantities makes
+    them, so a part with quantity q is one entry of `distinct`.
+    """
+    index, distinct = {}, []
+    kinds = np.empty(len(parts), dtype=np.intp)
+    for i, part in enumerate(parts):
+        k = index.get(id(part))
+        if k is None:
+            k = index[id(part)] = len(distinct)
+            distinct.append(part)
+        kinds[i] = k
+    return distinct, kinds
+
+
+def instance_geometries(parts):
+    """
+    Bare outlines for a list of part instances, one shared geometry object
+    per distinct part. Copies stay recognizable as one instance group and
+    pickle once when sent to worker processes.
+    """
+    distinct, kinds = instance_groups(parts)
+    shapes = [part_geometry(p) for p in distinct]
+    return [shapes[k] for k in kinds]
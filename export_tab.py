@@ -2,16 +2,19 @@
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
-    QTableWidgetItem, QGraphicsView, QGraphicsScene, QFileDialog,
+    QTableWidgetItem, QGraphicsScene, QFileDialog,
     QMessageBox, QFrame, QSplitter
 )
 from PyQt6.QtCore import Qt
+from ui.rendering import GeometryView, PathCache, draw_layouts
 
 
 class ExportTab(QWidget):
     def __init__(self, settings):
         super().__init__()
         self.settings = settings
+        self.result = None
+        self.path_cache = PathCache()
         self._init_ui()
 
     def _init_ui(self):
@@ -34,13 +37,27 @@ class ExportTab(QWidget):
         splitter.addWidget(self.results_table)
         view_frame = QFrame()
         view_layout = QVBoxLayout(view_frame)
-        self.graphic_view = QGraphicsView()
+        self.graphic_view = GeometryView()
         self.graphic_scene = QGraphicsScene()
         self.graphic_view.setScene(self.graphic_scene)
         view_layout.addWidget(self.graphic_view)
         splitter.addWidget(view_frame)
         layout.addWidget(splitter)
 
+    def show_result(self, result):
+        # Finished nesting run: one row per sheet and the drawn layouts
+        self.result = result
+        self.results_table.setRowCount(0)
+        for i, layout in enumerate(result['sheets'], start=1):
+            row = self.results_table.rowCount()
+            self.results_table.insertRow(row)
+            name = layout['sheet'].get('name', f'Sheet {i}')
+            self.results_table.setItem(row, 0, QTableWidgetItem(f'{i}: {name}'))
+            self.results_table.setItem(row, 1, QTableWidgetItem(f"{layout['efficiency']:.2%}"))
+        self.path_cache.clear()
+        draw_layouts(self.graphic_scene, result, self.path_cache)
+        self.graphic_view.fit()
+
     def export_dxf(self):
         path, _ = QFileDialog.getSaveFileName(self, 'Export DXF', '', 'DXF Files (*.dxf)')
         if path:
@@ -1,61 +1,278 @@
 # core/genetic_algorithm.py
 
-import random
-from shapely.affinity import rotate, translate
+import numpy as np
+from core.duplicates import instance_groups
+from core.fitness import FitnessEvaluator, FitnessCache
+from core.genome import random_population, positions, order_crossover, to_genes, genome_hash, canonical_instances
+from core.instrumentation import count, span, timed
+from core.parallel import ParallelEvaluator
 
 class GeneticAlgorithm:
     """
     Implements a configurable genetic algorithm for nesting.
+
+    The population is a (population_size, parts) structured array (see
+    core.genome), so selection, crossover and mutation are array operations
+    and children never share storage with their parents.
+
+    Copies of a part (the same dict repeated, see core.duplicates) form an
+    instance group. Genomes are kept canonical within each group, so
+    reordering copies among themselves is never searched twice, and swap
+    mutation only exchanges parts of different groups.
     """
-    def __init__(self, population_size, generations, rotation_angles):
+    mutation_rate = 0.1
+    mutation_step = 5.0
+    swap_retries = 4
+
+    def __init__(self, population_size, generations, rotation_angles, workers=1,
+                 spacing=0.0, margin=0.0, placement='bottom_left', cache_size=4096, seed=None):
         self.population_size = population_size
         self.generations = generations
         self.rotation_angles = rotation_angles
-        self.population = []
-
-    def initialize_population(self, parts, sheets):
-        # Each individual: random placement and rotation
-        for _ in range(self.population_size):
-            individual = []
-            for part in parts:
-                angle = random.choice(self.rotation_angles)
-                pos = (random.uniform(0, sheet['width']), random.uniform(0, sheet['height']))
-                individual.append({'part': part, 'angle': angle, 'pos': pos})
-            self.population.append(individual)
+        self.workers = workers
+        self.spacing = spacing
+        self.margin = margin
+        # 'bottom_left': positions come from the decoder; 'free': evolved directly
+        self.placement = placement
+        # Memoized scores by genome hash; None disables the cache
+        self.cache = FitnessCache(cache_size) if cache_size else None
+        self.population = None
+        # Scores and per-part overlap contributions of `population`, or None
+        self.scores = None
+        self.contrib = None
+        self.parts = []
+        # Instance group of every part, and part indices sorted by group;
+        # `members` is None when every part is distinct
+        self.kinds = None
+        self.members = None
+        self.sheet = None
+        self.evaluator = None
+        # Int or numpy SeedSequence; None draws fresh OS entropy
+        self.seed = seed
+        self.rng = None
+
+    def initialize_population(self, parts, sheets, initial=None):
+        # Each individual: random order, placement and rotation.
+        # `initial` optionally seeds the first individual with (order, rot).
+        sheet = sheets[0]
+        self.parts = parts
+        self.sheet = sheet
+        distinct, self.kinds = instance_groups(parts)
+        self.members = np.argsort(self.kinds, kind='stable') if len(distinct) < len(parts) else None
+        if self.rng is None:
+            self.rng = np.random.default_rng(self.seed)
+        if self.workers > 1:
+            self.evaluator = ParallelEvaluator(parts, sheet, self.rotation_angles, self.workers,
+                                               self.spacing, self.margin)
+        else:
+            self.evaluator = FitnessEvaluator(parts, sheet, self.rotation_angles, self.spacing, self.margin)
+        self.set_population(self.seeded_population(self.population_size, initial))
+
+    def set_population(self, population, scores=None, contrib=None):
+        self.population = population
+        self.scores = scores
+        self.contrib = contrib
+
+    def random_population(self, size):
+        population = random_population(self.rng, size, len(self.parts), len(self.rotation_angles),
+                                       self.sheet['width'], self.sheet['height'])
+        return self.canonicalize(population)
+
+    def seeded_population(self, size, initial=None):
+        # Random population whose first individual takes (order, rot) from `initial`
+        population = self.random_population(size)
+        if initial is not None and len(population):
+            population[0]['order'], population[0]['rot'] = initial
+            self.canonicalize(population[:1])
+        return population
+
+    def canonicalize(self, population):
+        # Same layout, one labelling per set of interchangeable copies
+        if self.members is not None:
+            canonical_instances(population, self.kinds, self.members)
+        return population
+
+    def to_genes(self, genome):
+        # Dict form of one individual, for DetailedReport and the UI
+        return to_genes(genome, self.parts, self.rotation_angles)
+
+    def evaluate(self, population):
+        # Batch score: one vectorized pass over the whole population
+        return self.score(population)[0]
+
+    @timed('ga.fitness')
+    def score(self, population, base=None):
+        """
+        Scores and per-part overlap contributions of a population. `base`
+        holds (rot, pos, contributions) of the individual each row was bred
+        from, letting the evaluator rescore only the genes that changed. In
+        bottom_left placement it starts with that individual's order, so the
+        decoder can copy the shared prefix of the layout.
+        Genomes seen before (or twice in this batch) come from the cache.
+        """
+        count('ga.evaluations', len(population))
+        if self.cache is None:
+            return self._score(population, base)
+        n_pop, n_parts = population.shape
+        scores = np.empty(n_pop)
+        contrib = np.empty((n_pop, n_parts))
+        # Decoded layouts follow from order and rotation alone.
+        with_positions = self.placement != 'bottom_left'
+        keys = [genome_hash(row, with_positions) for row in population]
+        first_seen = {}
+        copies = []
+        misses = []
+        for i, key in enumerate(keys):
+            if key in first_seen:
+                copies.append((i, first_seen[key]))
+                continue
+            first_seen[key] = i
+            hit = self.cache.get(key)
+            if hit is None:
+                misses.append(i)
+            else:
+                scores[i], contrib[i], population['x'][i], population['y'][i] = hit
+        misses = np.array(misses, dtype=np.intp)
+        count('ga.cache_misses', len(misses))
+        if len(misses):
+            subset = population[misses]
+            sub_base = None if base is None else tuple(np.asarray(b)[misses] for b in base)
+            sub_scores, sub_contrib = self._score(subset, sub_base)
+            population[misses] = subset
+            scores[misses] = sub_scores
+            contrib[misses] = sub_contrib
+            for j, i in enumerate(misses):
+                self.cache.put(keys[i], (sub_scores[j], sub_contrib[j].copy(),
+                                         subset['x'][j].copy(), subset['y'][j].copy()))
+        for i, src in copies:
+            # Duplicates within the batch count as hits too
+            self.cache.hits += 1
+            scores[i], contrib[i] = scores[src], contrib[src]
+            population['x'][i], population['y'][i] = population['x'][src], population['y'][src]
+        return scores, contrib
+
+    def _score(self, population, base=None):
+        if self.placement == 'bottom_left':
+            # Decoded positions are written back into the genomes
+            pos, scores, contrib = self.evaluator.decode_and_score(population['order'], population['rot'], base)
+            population['x'] = pos[..., 0]
+            population['y'] = pos[..., 1]
+            return scores, contrib
+        return self.evaluator.score(population['rot'], positions(population), base)
 
     def fitness(self, individual):
-        # Placeholder: evaluate based on bounding box overlap and sheet use
-        return random.random()
+        return float(self.evaluate(individual[None, :])[0])
+
+    def rank(self):
+        # Indices of the population, best first
+        if self.scores is None:
+            self.scores, self.contrib = self.score(self.population)
+        return np.argsort(-self.scores, kind='stable')
 
+    def elite_size(self):
+        # Half the population survives each generation, at least one individual
+        return max(1, self.population_size // 2)
+
+    @timed('ga.select')
     def select(self):
-        # Tournament selection
-        sorted_pop = sorted(self.population, key=self.fitness, reverse=True)
-        return sorted_pop[:self.population_size//2]
-
-    def crossover(self, parents):
-        # Single-point crossover
-        offspring = []
-        for _ in range(len(parents)):
-            p1, p2 = random.sample(parents, 2)
-            point = random.randint(1, len(p1)-1)
-            child = p1[:point] + p2[point:]
-            offspring.append(child)
+        # Truncation selection on batch-evaluated scores
+        return self.population[self.rank()[:self.elite_size()]]
+
+    def pair_parents(self, n_pop):
+        first = self.rng.integers(0, n_pop, n_pop)
+        second = (first + self.rng.integers(1, n_pop, n_pop)) % n_pop
+        return first, second
+
+    @timed('ga.crossover')
+    def crossover(self, parents, pairs=None):
+        # Order crossover on the sequence, single-point crossover on the rest
+        n_pop, n_parts = parents.shape
+        if n_pop < 2:
+            return parents.copy()
+        first, second = pairs if pairs is not None else self.pair_parents(n_pop)
+        p1, p2 = parents[first], parents[second]
+        offspring = p1.copy()
+        offspring['order'] = order_crossover(self.rng, p1['order'], p2['order'])
+        if n_parts > 1:
+            point = self.rng.integers(1, n_parts, (n_pop, 1))
+            tail = np.arange(n_parts) >= point
+            for field in ('rot', 'x', 'y'):
+                offspring[field][tail] = p2[field][tail]
         return offspring
 
-    def mutate(self, individual):
-        # Randomly change angle or position
-        for gene in individual:
-            if random.random() < 0.1:
-                gene['angle'] = random.choice(self.rotation_angles)
-                gene['pos'] = (gene['pos'][0] + random.uniform(-5,5), gene['pos'][1] + random.uniform(-5,5))
-
-    def run(self, parts, sheets):
-        self.initialize_population(parts, sheets)
-        for _ in range(self.generations):
-            parents = self.select()
-            offspring = self.crossover(parents)
-            for child in offspring:
-                self.mutate(child)
-            self.population = parents + offspring
-        best = max(self.population, key=self.fitness)
+    @timed('ga.mutate')
+    def mutate(self, offspring):
+        # Randomly change angle and position, and swap two parts in the sequence
+        n_pop, n_parts = offspring.shape
+        if n_parts == 0:
+            return
+        hit = self.rng.random((n_pop, n_parts)) < self.mutation_rate
+        n_hit = int(hit.sum())
+        offspring['rot'][hit] = self.rng.integers(0, len(self.rotation_angles), n_hit)
+        offspring['x'][hit] += self.rng.uniform(-self.mutation_step, self.mutation_step, n_hit)
+        offspring['y'][hit] += self.rng.uniform(-self.mutation_step, self.mutation_step, n_hit)
+        rows = np.flatnonzero(self.rng.random(n_pop) < self.mutation_rate)
+        a = self.rng.integers(0, n_parts, len(rows))
+        b = self.rng.integers(0, n_parts, len(rows))
+        order = offspring['order']
+        if self.members is not None:
+            # Swapping two copies of one part changes nothing: redraw the
+            # partner a few times, then drop swaps that found no other group
+            same = self.kinds[order[rows, a]] == self.kinds[order[rows, b]]
+            for _ in range(self.swap_retries):
+                if not same.any():
+                    break
+                b[same] = self.rng.integers(0, n_parts, int(same.sum()))
+                same = self.kinds[order[rows, a]] == self.kinds[order[rows, b]]
+            rows, a, b = rows[~same], a[~same], b[~same]
+        order[rows, a], order[rows, b] = order[rows, b], order[rows, a]
+
+    @timed('ga.generation')
+    def step(self):
+        # One generation: elitist truncation, crossover, mutation. Offspring
+        # are scored incrementally against their first parent; decoded
+        # layouts also reuse the order prefix they share with it.
+        with span('ga.select'):
+            keep = self.rank()[:self.elite_size()]
+            parents = self.population[keep]
+            scores, contrib = self.scores[keep], self.contrib[keep]
+        if len(parents) < 2:
+            offspring, first = parents.copy(), np.arange(len(parents))
+        else:
+            first, second = self.pair_parents(len(parents))
+            offspring = self.crossover(parents, (first, second))
+        self.mutate(offspring)
+        self.canonicalize(offspring)
+        base = (parents['rot'][first], positions(parents)[first], contrib[first])
+        if self.placement == 'bottom_left':
+            base = (parents['order'][first],) + base
+        o_scores, o_contrib = self.score(offspring, base)
+        self.set_population(np.concatenate([parents, offspring]),
+                            np.concatenate([scores, o_scores]),
+                            np.concatenate([contrib, o_contrib]))
+
+    def best(self):
+        # Copy of the best individual, safe to hand to another thread
+        return self.population[self.rank()[0]].copy()
+
+    def run(self, parts, sheets, initial=None, on_generation=None, cancel=None):
+        """
+        Evolve for `generations` and return the best individual.
+
+        `on_generation(done, best)` is called after every generation with a
+        copy of the best individual so far. `cancel` is checked between
+        generations; once it is set the current best is returned early.
+        """
+        self.initialize_population(parts, sheets, initial)
+        try:
+            for done in range(1, self.generations + 1):
+                if cancel is not None and cancel.is_set():
+                    break
+                self.step()
+                if on_generation is not None:
+                    on_generation(done, self.best())
+            best = self.population[self.rank()[0]]
+        finally:
+            if hasattr(self.evaluator, 'close'):
+                self.evaluator.close()
         return best
@@ -0,0 +1,112 @@
+# core/genome.py
+
+import hashlib
+
+import numpy as np
+
+# One gene per part. `order` is the placement sequence (order[k] is the
+# index of the part placed k-th); `rot`, `x` and `y` are indexed by part.
+# Positions stay float64: decoded parts touch exactly, and float32 rounding
+# could push one a fraction into its neighbour.
+GENE_DTYPE = np.dtype([
+    ('order', np.int32),
+    ('rot', np.uint16),
+    ('x', np.float64),
+    ('y', np.float64),
+])
+
+
+def seed_sequence(seed=None):
+    """
+    numpy SeedSequence for a run: `seed` may be an int, an existing
+    SeedSequence (returned as is) or None for fresh OS entropy. Child
+    streams for workers and islands come from its spawn().
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def random_population(rng, size, n_parts, n_angles, width, height):
+    """Population of shape (size, n_parts) with random order, rotation and position."""
+    pop = np.empty((size, n_parts), dtype=GENE_DTYPE)
+    pop['order'] = np.argsort(rng.random((size, n_parts)), axis=1)
+    pop['rot'] = rng.integers(0, max(n_angles, 1), (size, n_parts))
+    pop['x'] = rng.uniform(0, width, (size, n_parts))
+    pop['y'] = rng.uniform(0, height, (size, n_parts))
+    return pop
+
+
+def positions(pop):
+    """(..., n_parts, 2) float array of gene positions."""
+    return np.stack([pop['x'], pop['y']], axis=-1).astype(float)
+
+
+def order_crossover(rng, first, second):
+    """
+    Vectorized order crossover (OX) of two (P, N) permutation arrays: each
+    child keeps a random slice of `first` and fills the remaining slots with
+    the missing parts in the order they appear in `second`.
+    """
+    n_pop, n = first.shape
+    child = first.copy()
+    if n < 2:
+        return child
+    cuts = np.sort(rng.integers(0, n + 1, (n_pop, 2)), axis=1)
+    slots = np.arange(n)
+    keep = (slots >= cuts[:, :1]) & (slots < cuts[:, 1:])
+    # kept[p, part] marks parts already provided by `first`
+    kept = np.zeros((n_pop, n), dtype=bool)
+    rows = np.broadcast_to(np.arange(n_pop)[:, None], (n_pop, n))
+    kept[rows[keep], first[keep]] = True
+    fill = ~kept[rows, second]
+    # Both masks select n - len(slice) entries per row, so the row-major
+    # flattening lines them up without a Python loop.
+    child[~keep] = second[fill]
+    return child
+
+
+def canonical_instances(pop, kinds, members=None):
+    """
+    Renumber interchangeable genes of a (P, N) population in place. Genes
+    with equal `kinds` are copies of one part; the k-th copy placed takes
+    the k-th index of its group, carrying its rotation and position along.
+    Genomes that differ only in which copy goes where then become the same
+    genome, with the same layout and the same hash. `members` is
+    argsort(kinds) (stable), if already known.
+    """
+    if members is None:
+        members = np.argsort(kinds, kind='stable')
+    order = pop['order']
+    rows = np.arange(len(pop))[:, None]
+    # Slots sorted by group, each group in placement order
+    slots = np.argsort(kinds[order], axis=1, kind='stable')
+    relabel = np.empty_like(order)
+    relabel[rows, slots] = members
+    for field in ('rot', 'x', 'y'):
+        values = pop[field][rows, order]
+        pop[field][rows, relabel] = values
+    pop['order'] = relabel
+    return pop
+
+
+def to_genes(genome, parts, rotation_angles):
+    """Expand one genome row into the list-of-dicts form used by reports."""
+    return [{'part': parts[i],
+             'angle': rotation_angles[int(genome['rot'][i])],
+             'pos': (float(genome['x'][i]), float(genome['y'][i]))}
+            for i in genome['order']]
+
+
+def genome_hash(genome, with_positions=True, quantum=1e-3):
+    """
+    Canonical digest of one genome row: its order, rotation indices and,
+    unless positions are derived from those, its positions snapped to a
+    `quantum` grid so float noise does not defeat the hash.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(genome['order']).tobytes())
+    h.update(np.ascontiguousarray(genome['rot']).tobytes())
+    if with_positions:
+        h.update(np.round(positions(genome) / quantum).astype(np.int64).tobytes())
+    return h.digest()
@@ -0,0 +1,50 @@
+# core/geometry_levels.py
+
+from shapely.geometry import Point, Polygon, box
+from shapely.geometry.base import BaseGeometry
+
+DEFAULT_TOLERANCE = 0.1
+
+
+def part_geometry(part):
+    """Return the shapely outline of a part dict (or of a bare geometry)."""
+    if isinstance(part, BaseGeometry):
+        return part
+    geom = part.get('geometry')
+    if geom is not None:
+        return geom
+    if 'width' in part and 'height' in part:
+        return box(0, 0, float(part['width']), float(part['height']))
+    return Point(0, 0)
+
+
+class PartLevels:
+    """
+    One part outline at two levels of detail, coarse to fine:
+
+    - `outline`: the outer contour grown by half the part-to-part spacing
+      plus `tolerance`, then simplified by `tolerance`. Simplification moves
+      the boundary by at most `tolerance`, so the outline always covers the
+      part's clearance zone while carrying far fewer vertices;
+    - `full`: the geometry as imported, holes included.
+
+    Two parts whose outlines are disjoint can never be closer than the
+    spacing, so only pairs whose outlines meet need the full geometry.
+    Boxes at a given rotation come from a RotationTable over the outlines.
+    """
+    def __init__(self, geometry, spacing=0.0, tolerance=DEFAULT_TOLERANCE):
+        self.full = geometry
+        self.spacing = float(spacing)
+        self.tolerance = float(tolerance)
+        if isinstance(geometry, Polygon):
+            shell = Polygon(geometry.exterior)
+        else:
+            shell = geometry.convex_hull
+        pad = self.spacing / 2 + self.tolerance
+        if pad > 0:
+            # Mitre joins never fall inside the true offset, unlike the
+            # chords GEOS uses to approximate round joins.
+            shell = shell.buffer(pad, join_style='mitre', mitre_limit=2.0)
+        if self.tolerance > 0:
+            shell = shell.simplify(self.tolerance, preserve_topology=True)
+        self.outline = shell
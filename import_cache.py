@@ -0,0 +1,105 @@
+# core/import_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import shapely
+from shapely import GeometryType
+
+# Bump whenever the importer's output changes for the same file and settings
+FORMAT_VERSION = 3
+
+
+def file_hash(filepath, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+def part_names(filepath, count):
+    """
+    Names of the `count` parts imported from a file: its base name, with
+    _1, _2, ... appended when it holds several parts.
+    """
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return [name] if count == 1 else [f'{name}_{i}' for i in range(1, count + 1)]
+
+
+class ImportCache:
+    """
+    Content-addressed on-disk cache of imported parts.
+
+    Entries are keyed by the file's content hash plus the import settings,
+    so renamed or copied files still hit and edited files never do. Each
+    entry is a directory holding the outlines packed in shapely's ragged
+    array layout (coords.npy, rings.npy, parts.npy), memory-mapped back on
+    load, and meta.json with the per-part layers. Part names are not
+    stored: they follow the path the file is loaded from.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, filepath, settings):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(FORMAT_VERSION).encode())
+        h.update(file_hash(filepath))
+        h.update(json.dumps(settings, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key, filepath):
+        """Parts stored under `key`, named after `filepath`; None on a miss."""
+        path = self._path(key)
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            self.misses += 1
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.hits += 1
+        if not meta['layers']:
+            return []
+        coords, rings, parts = (np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                                for name in ('coords', 'rings', 'parts'))
+        geoms = shapely.from_ragged_array(GeometryType.POLYGON, coords, (rings, parts))
+        bounds = shapely.bounds(geoms)
+        areas = shapely.area(geoms)
+        return [{
+            'geometry': geom,
+            'name': name,
+            'width': float(maxx - minx),
+            'height': float(maxy - miny),
+            'area': float(area),
+            'layer': layer,
+        } for geom, name, layer, (minx, miny, maxx, maxy), area
+            in zip(geoms, part_names(filepath, len(geoms)), meta['layers'], bounds, areas)]
+
+    def put(self, key, parts):
+        geoms = np.array([part['geometry'] for part in parts], dtype=object)
+        if len(geoms) and not (shapely.get_type_id(geoms) == GeometryType.POLYGON).all():
+            # Only plain polygons have a packed layout; leave the rest uncached
+            return
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+        if len(geoms):
+            _, coords, (rings, offsets) = shapely.to_ragged_array(geoms)
+            np.save(os.path.join(tmp, 'coords.npy'), coords)
+            np.save(os.path.join(tmp, 'rings.npy'), rings)
+            np.save(os.path.join(tmp, 'parts.npy'), offsets)
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'layers': [p.get('layer', '0') for p in parts]}, f)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
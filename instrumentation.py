@@ -0,0 +1,220 @@
+# core/instrumentation.py
+
+import cProfile
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# The Recorder spans and counters go to; None (the default) turns every
+# hook below into a single global lookup.
+_recorder = None
+
+
+class Recorder:
+    """
+    Timed spans and counters of one run.
+
+    Spans are kept as (name, start, end, pid, tid, args) with perf_counter
+    timestamps, so spans recorded in worker processes on the same machine
+    line up with the parent's once merged (see traced_call and pool_map).
+    """
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, start, end, args=None):
+        self.spans.append((name, start, end, os.getpid(), threading.get_ident(), args))
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def export(self):
+        """Picklable snapshot, for handing a worker's recording back."""
+        return {'spans': list(self.spans), 'counters': dict(self.counters)}
+
+    def merge(self, data):
+        self.spans.extend(data['spans'])
+        for name, n in data['counters'].items():
+            self.count(name, n)
+
+    def summary(self):
+        """{'spans': {name: {count, total, mean, max}}, 'counters': {...}}, slowest first."""
+        stats = {}
+        for name, start, end, *_ in self.spans:
+            s = stats.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            s['count'] += 1
+            s['total'] += end - start
+            s['max'] = max(s['max'], end - start)
+        for s in stats.values():
+            s['mean'] = s['total'] / s['count']
+        ordered = dict(sorted(stats.items(), key=lambda kv: -kv[1]['total']))
+        return {'spans': ordered, 'counters': dict(self.counters)}
+
+    def chrome_trace(self):
+        """The recording in Chrome trace format (chrome://tracing, Perfetto)."""
+        events = []
+        for name, start, end, pid, tid, args in self.spans:
+            event = {'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': (start - self.t0) * 1e6, 'dur': (end - start) * 1e6}
+            if args:
+                event['args'] = args
+            events.append(event)
+        end = max((s[2] for s in self.spans), default=self.t0)
+        for name, n in self.counters.items():
+            events.append({'name': name, 'ph': 'C', 'pid': os.getpid(), 'tid': 0,
+                           'ts': (end - self.t0) * 1e6, 'args': {'value': n}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'args', 'start')
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def active():
+    """The Recorder in use, or None when instrumentation is off."""
+    return _recorder
+
+
+def span(name, **args):
+    """Context manager timing a block as one span."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return _Span(_recorder, name, args or None)
+
+
+def count(name, n=1):
+    if _recorder is not None:
+        _recorder.count(name, n)
+
+
+def timed(name):
+    """Decorator timing every call of a function as a span called `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                recorder.add(name, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def recording(recorder=None):
+    """Turn instrumentation on for the block; yields the Recorder."""
+    global _recorder
+    previous = _recorder
+    _recorder = recorder if recorder is not None else Recorder()
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+def traced_call(fn, *args):
+    """
+    Run fn(*args) under a fresh Recorder and return (result, recording).
+    Module-level so worker processes can run it; the parent merges the
+    recording into its own.
+    """
+    with recording() as recorder:
+        result = fn(*args)
+    return result, recorder.export()
+
+
+def pool_map(pool, fn, *iterables):
+    """pool.map(fn, ...) that brings worker spans back when recording."""
+    recorder = _recorder
+    if recorder is None:
+        return list(pool.map(fn, *iterables))
+    results = []
+    for result, data in pool.map(traced_call, itertools.repeat(fn), *iterables):
+        recorder.merge(data)
+        results.append(result)
+    return results
+
+
+def pool_submit(pool, fn, *args):
+    """
+    pool.submit(fn, *args) for reading back with pool_result(), which
+    brings the worker's spans back when recording.
+    """
+    if _recorder is None:
+        return pool.submit(fn, *args)
+    return pool.submit(traced_call, fn, *args)
+
+
+def pool_result(future):
+    """Result of a pool_submit() future, under the same recording."""
+    if _recorder is None:
+        return future.result()
+    result, data = future.result()
+    _recorder.merge(data)
+    return result
+
+
+@contextmanager
+def profiled(path):
+    """Run the block under cProfile and dump pstats to `path` (None: no-op)."""
+    if not path:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def format_summary(summary, limit=6):
+    """One line per slowest span, for status labels and logs."""
+    lines = [f"{name}: {s['total']:.3f} s / {s['count']} calls"
+             for name, s in itertools.islice(summary['spans'].items(), limit)]
+    counters = ', '.join(f'{name} {n}' for name, n in summary['counters'].items())
+    if counters:
+        lines.append(counters)
+    return '\n'.join(lines)
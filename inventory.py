@@ -0,0 +1,83 @@
+# core/inventory.py
+
+import numpy as np
+
+from core.fitness import rotated_sizes
+from core.placement import BottomLeftDecoder
+
+
+def sheet_cost(sheet):
+    """Cost of consuming one sheet; defaults to its area."""
+    return float(sheet.get('cost', sheet['width'] * sheet['height']))
+
+
+class SheetInventory:
+    """
+    Stock of sheets by type, consumed one sheet at a time.
+    Sheets without a `quantity` count as a single sheet.
+    """
+    def __init__(self, sheets):
+        self.sheets = list(sheets)
+        self.stock = [int(s.get('quantity', 1)) for s in self.sheets]
+
+    def available(self):
+        return [i for i, qty in enumerate(self.stock) if qty > 0]
+
+    def take(self, index):
+        if self.stock[index] <= 0:
+            raise ValueError(f"No stock left for sheet {self.sheets[index].get('name', index)}")
+        self.stock[index] -= 1
+        return self.sheets[index]
+
+
+def assign_parts(parts, sheets, rotation_angles, spacing=0.0, margin=0.0):
+    """
+    Split parts across a sheet inventory with greedy spill-over.
+
+    Parts are packed largest first with the bottom-left decoder. For every
+    new sheet each stocked sheet type is tried on all parts still waiting,
+    and the type with the lowest cost per unit of placed part area is
+    consumed; whatever it cannot hold spills onto the next sheet.
+
+    Returns (assignments, unplaced) where each assignment is a dict with
+    the `sheet`, the `parts` indices it holds and the greedy `order`, `rot`
+    and decoded `pos` (local to those parts) that packed them, usable as a
+    GA seed.
+    """
+    inventory = SheetInventory(sheets)
+    sizes, areas = rotated_sizes(parts, rotation_angles)
+    # Lay parts flat: the rotation with the lowest height packs rows best.
+    rot = sizes[..., 1].argmin(axis=0)
+    remaining = np.argsort(-areas, kind='stable')
+    assignments = []
+
+    while len(remaining) and inventory.available():
+        best = None
+        for index in inventory.available():
+            sheet = inventory.sheets[index]
+            decoder = BottomLeftDecoder(sizes[:, remaining], sheet, spacing, margin)
+            local = np.arange(len(remaining))
+            pos, placed = decoder.decode(local, rot[remaining])
+            placed_area = areas[remaining][placed].sum()
+            if not placed.any():
+                continue
+            # Zero-area parts still need a sheet; rank them by plain cost.
+            score = sheet_cost(sheet) / placed_area if placed_area > 0 else sheet_cost(sheet)
+            if best is None or score < best[0]:
+                best = (score, index, placed, pos)
+        if best is None:
+            break
+        _, index, placed, pos = best
+        held = remaining[placed]
+        assignments.append({
+            'sheet': inventory.take(index),
+            'parts': held,
+            'order': np.arange(len(held)),
+            'rot': rot[held],
+            # Unplaced parts never block later ones, so the held parts
+            # decode to the same spots on their own.
+            'pos': pos[placed],
+        })
+        remaining = remaining[~placed]
+
+    return assignments, remaining
@@ -0,0 +1,133 @@
+# core/islands.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.duplicates import instance_geometries
+from core.genetic_algorithm import GeneticAlgorithm
+from core.genome import seed_sequence
+from core.instrumentation import pool_map, span, timed
+
+TOPOLOGIES = ('ring', 'full')
+
+# Per-process GA shell, built once by the pool initializer.
+_worker_ga = None
+
+
+def _init_island_worker(geometries, sheets, rotation_angles, population_size, ga_options):
+    global _worker_ga
+    _worker_ga = GeneticAlgorithm(population_size, 0, rotation_angles, **ga_options)
+    _worker_ga.initialize_population(geometries, sheets)
+
+
+def _evolve_island(state, generations):
+    # Islands carry their own generator, so the result does not depend on
+    # which process happens to pick up which island.
+    ga = _worker_ga
+    ga.rng = state['rng']
+    if state['population'] is None:
+        ga.set_population(ga.seeded_population(ga.population_size, state.get('initial')))
+    else:
+        ga.set_population(state['population'])
+    before = ga.cache.stats() if ga.cache else {'hits': 0, 'misses': 0}
+    for _ in range(generations):
+        ga.step()
+    ga.rank()
+    after = ga.cache.stats() if ga.cache else before
+    # The worker's cache outlives the call; report only this epoch's lookups.
+    cache = {k: after[k] - before[k] for k in ('hits', 'misses')}
+    return {'population': ga.population, 'scores': ga.scores, 'rng': ga.rng, 'cache': cache}
+
+
+class IslandModel:
+    """
+    Island-model GA: independent sub-populations evolve in separate
+    processes and exchange their best individuals every few generations.
+    """
+    def __init__(self, population_size, generations, rotation_angles,
+                 islands=4, migration_interval=10, migrants=2, topology='ring', seed=None, **ga_options):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f'Unknown island topology: {topology}')
+        self.islands = max(1, islands)
+        self.island_size = max(4, population_size // self.islands)
+        self.generations = generations
+        self.rotation_angles = rotation_angles
+        self.migration_interval = max(1, migration_interval)
+        self.migrants = migrants
+        self.topology = topology
+        # Root of the islands' generator streams (int or SeedSequence)
+        self.seed = seed
+        # Extra GeneticAlgorithm keyword arguments (spacing, margin, placement)
+        self.ga_options = ga_options
+        # Fitness cache lookups summed over islands and epochs of the last run
+        self.cache_stats = {'hits': 0, 'misses': 0}
+
+    def targets(self, island):
+        if self.topology == 'ring':
+            return [(island + 1) % self.islands] if self.islands > 1 else []
+        return [j for j in range(self.islands) if j != island]
+
+    @timed('islands.migrate')
+    def migrate(self, states):
+        # Copy emigrants out first so replacements never feed each other.
+        emigrants = []
+        for state in states:
+            best = np.argsort(-state['scores'])[:self.migrants]
+            emigrants.append((state['population'][best], state['scores'][best]))
+        incoming = [[] for _ in states]
+        for src in range(len(states)):
+            for dst in self.targets(src):
+                incoming[dst].append(emigrants[src])
+        for dst, arrivals in enumerate(incoming):
+            if not arrivals:
+                continue
+            state = states[dst]
+            population = np.concatenate([a[0] for a in arrivals])
+            scores = np.concatenate([a[1] for a in arrivals])
+            count = min(len(population), len(state['population']) // 2)
+            worst = np.argsort(state['scores'])[:count]
+            state['population'][worst] = population[:count]
+            state['scores'][worst] = scores[:count]
+
+    def run(self, parts, sheets, on_epoch=None, cancel=None, seed=None, initial=None):
+        """
+        Evolve all islands and return the best genome row. `on_epoch(done,
+        best)` reports the best individual after every migration epoch;
+        `cancel` is checked between epochs. Each island draws from its own
+        stream spawned from `seed` (default: the model's). `initial`
+        optionally seeds the first individual of island 0 with (order, rot),
+        as in GeneticAlgorithm.run; migration spreads it from there.
+        """
+        root = seed_sequence(self.seed if seed is None else seed)
+        states = [{'population': None, 'rng': np.random.default_rng(child)} for child in root.spawn(self.islands)]
+        states[0]['initial'] = initial
+        geometries = instance_geometries(parts)
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        with ProcessPoolExecutor(
+            max_workers=self.islands,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_island_worker,
+            initargs=(geometries, sheets, list(self.rotation_angles), self.island_size, self.ga_options),
+        ) as pool:
+            done = 0
+            while True:
+                step = min(self.migration_interval, self.generations - done)
+                with span('islands.epoch'):
+                    states = pool_map(pool, _evolve_island, states, [step] * self.islands)
+                done += step
+                for state in states:
+                    for key in self.cache_stats:
+                        self.cache_stats[key] += state['cache'][key]
+                if on_epoch is not None:
+                    on_epoch(done, self.best(states).copy())
+                if done >= self.generations or (cancel is not None and cancel.is_set()):
+                    break
+                self.migrate(states)
+        return self.best(states)
+
+    def best(self, states):
+        island = max(range(len(states)), key=lambda k: states[k]['scores'].max())
+        state = states[island]
+        return state['population'][int(state['scores'].argmax())]
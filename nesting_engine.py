@@ -1,21 +1,316 @@
 # core/nesting_engine.py
 
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from core.collision import validate_layout
+from core.duplicates import expand_quantities
+from core.geometry_levels import DEFAULT_TOLERANCE, part_geometry
 from core.genetic_algorithm import GeneticAlgorithm
+from core.genome import GENE_DTYPE, seed_sequence, to_genes
+from core.instrumentation import pool_map, pool_result, pool_submit, span, timed
+from core.inventory import assign_parts, sheet_cost
+from core.islands import IslandModel
+from core.nfp import NFPCache
+
+ISLAND_STRATEGY = 'Island Model'
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag checked by the GA between generations.
+    With a `time_limit` (seconds) it also trips on its own once the limit
+    has passed since creation.
+    """
+    def __init__(self, time_limit=None, event=None):
+        # `event`: a multiprocessing Manager Event lets worker processes
+        # share the token
+        self._event = event if event is not None else threading.Event()
+        self.deadline = time.monotonic() + time_limit if time_limit else None
+
+    def cancel(self):
+        self._event.set()
+
+    def is_set(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self._event.set()
+        return self._event.is_set()
+
+
+def cache_stats(stats):
+    """Sum fitness cache hit/miss counters from several GA runs."""
+    stats = [s for s in stats if s]
+    hits = sum(s['hits'] for s in stats)
+    misses = sum(s['misses'] for s in stats)
+    lookups = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / lookups if lookups else 0.0}
+
+
+def seed_genome(job):
+    """Genome row of the greedy inventory packing for one sheet job."""
+    genome = np.zeros(len(job['order']), dtype=GENE_DTYPE)
+    genome['order'] = job['order']
+    genome['rot'] = job['rot']
+    genome['x'], genome['y'] = np.asarray(job['pos'], dtype=float).reshape(-1, 2).T
+    return genome
+
+
+@timed('nest.sheet')
+def solve_sheet(job, on_generation=None, cancel=None):
+    """
+    Run the GA for the parts assigned to one sheet. Module-level so it can
+    run in a worker process; returns the best genome row and the GA's
+    fitness cache statistics. `on_generation(done, best, stats)` also gets
+    the cache statistics so far; `cancel` is passed on to
+    GeneticAlgorithm.run.
+    """
+    ga = GeneticAlgorithm(job['population_size'], job['generations'], job['rotation_angles'],
+                          workers=job.get('workers', 1), seed=job['seed'], **job['ga_options'])
+
+    def report(done, best):
+        on_generation(done, best, ga.cache.stats() if ga.cache else cache_stats([]))
+
+    initial = (job['order'], job['rot'])
+    best = ga.run(job['parts'], [job['sheet']], initial, report if on_generation else None, cancel)
+    return keep_placed(ga, best, initial), ga.cache.stats() if ga.cache else cache_stats([])
+
+
+def keep_placed(ga, best, initial):
+    """
+    `best`, or the seed individual `initial` (order, rot) evaluated by `ga`
+    if in bottom_left mode `best` lost a part the seed had placed.
+    Elitism keeps the greedy seed around, but the decoder leaves a part it
+    cannot fit off the sheet, so check explicitly.
+    """
+    if ga.placement != 'bottom_left':
+        return best
+    _, placed = ga.evaluator.decoder.decode(best['order'], best['rot'])
+    if placed.all():
+        return best
+    seed = ga.population[:1].copy()
+    seed['order'], seed['rot'] = initial
+    ga.evaluate(ga.canonicalize(seed))
+    return seed[0]
+
 
 class NestingEngine:
     """
     High-level interface for nesting parts onto sheets.
+
+    Parts are first spread over the sheet inventory (see core.inventory);
+    each sheet's share is then an independent GA problem, solved in
+    parallel when more than one worker is configured.
+
+    Anytime mode: given a progress callback or a cancel token (or a
+    `time_limit` in the settings), sheets are solved one after another and
+    the best layout so far is reported every `report_every` generations or
+    `report_interval` seconds, whichever comes first. Cancelling returns
+    the best layout found so far; sheets not yet started keep their greedy
+    packing. With more than one worker and sheet, sheets are solved in
+    parallel instead and reported as each one finishes.
     """
-    def __init__(self, settings):
+    def __init__(self, settings, strategy=None):
         ga_cfg = settings['genetic_algorithm']
-        self.ga = GeneticAlgorithm(
-            ga_cfg['population_size'],
-            ga_cfg['generations'],
-            ga_cfg['rotation_angles']
+        self.strategy = strategy
+        self.population_size = ga_cfg['population_size']
+        self.generations = ga_cfg['generations']
+        self.rotation_angles = ga_cfg['rotation_angles']
+        self.workers = ga_cfg.get('workers', 1)
+        spacing = settings.get('spacing', {})
+        self.ga_options = {
+            'spacing': spacing.get('part_to_part', 0.0),
+            'margin': spacing.get('margin', 0.0),
+            'placement': ga_cfg.get('placement', 'bottom_left'),
+            'cache_size': ga_cfg.get('fitness_cache_size', 4096),
+        }
+        self.island_cfg = ga_cfg.get('islands', {})
+        self.tolerance = settings.get('geometry', {}).get('simplify_tolerance', DEFAULT_TOLERANCE)
+        self.time_limit = ga_cfg.get('time_limit', 0)
+        self.report_every = max(1, ga_cfg.get('report_every', 10))
+        self.report_interval = ga_cfg.get('report_interval', 1.0)
+        # Same seed, same settings, same layouts; None picks a fresh seed per run
+        self.seed = ga_cfg.get('seed')
+        # No-fit polygons for layout validation, kept on disk across runs if configured
+        nfp_dir = settings.get('file_paths', {}).get('nfp_cache')
+        self.nfp_cache = NFPCache(cache_dir=os.path.expanduser(nfp_dir) if nfp_dir else None)
+
+    def _islands(self):
+        cfg = self.island_cfg
+        return IslandModel(
+            self.population_size,
+            self.generations,
+            self.rotation_angles,
+            islands=cfg.get('count', 4),
+            migration_interval=cfg.get('migration_interval', 10),
+            migrants=cfg.get('migrants', 2),
+            topology=cfg.get('topology', 'ring'),
+            **self.ga_options
         )
 
-    def nest(self, parts, sheets):
-        # parts: list of geometries
-        # sheets: list of dicts {width, height, name}
-        result = self.ga.run(parts, sheets)
+    def _solve(self, jobs):
+        if self.strategy == ISLAND_STRATEGY:
+            # Islands already fill the machine; run sheets one after another.
+            model = self._islands()
+            return [self._solve_islands(model, job) for job in jobs]
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(jobs)),
+                mp_context=multiprocessing.get_context('spawn'),
+            ) as pool:
+                return pool_map(pool, solve_sheet, jobs)
+        for job in jobs:
+            # A single sheet gets the whole worker budget for its generations.
+            job['workers'] = self.workers
+        return [solve_sheet(job) for job in jobs]
+
+    def _solve_islands(self, model, job, on_epoch=None, cancel=None):
+        # on_epoch(done, best, stats), as for solve_sheet
+        def report(done, best):
+            on_epoch(done, best, dict(model.cache_stats))
+
+        initial = (job['order'], job['rot'])
+        best = model.run(job['parts'], [job['sheet']], report if on_epoch else None, cancel, job['seed'], initial)
+        # The islands' GAs live in the workers; a one-individual shell
+        # decodes the result here.
+        ga = GeneticAlgorithm(1, 0, self.rotation_angles, **self.ga_options)
+        ga.initialize_population(job['parts'], [job['sheet']], initial)
+        return keep_placed(ga, best, initial), dict(model.cache_stats)
+
+    def _solve_anytime(self, jobs, unplaced, callback, cancel):
+        # Until a sheet has been evolved its greedy packing stands in for it.
+        solutions = [(seed_genome(job), None) for job in jobs]
+        if self.strategy != ISLAND_STRATEGY and self.workers > 1 and len(jobs) > 1:
+            return self._solve_anytime_parallel(jobs, solutions, unplaced, callback, cancel)
+        model = self._islands() if self.strategy == ISLAND_STRATEGY else None
+        last_report = time.monotonic()
+
+        def reporter(k):
+            def on_generation(done, best, stats):
+                nonlocal last_report
+                solutions[k] = (best, stats)
+                now = time.monotonic()
+                if callback is None:
+                    return
+                if done % self.report_every and now - last_report < self.report_interval:
+                    return
+                last_report = now
+                fraction = (k + done / max(self.generations, 1)) / len(jobs)
+                callback(self._progress(jobs, solutions, unplaced), fraction)
+            return on_generation
+
+        for k, job in enumerate(jobs):
+            if cancel.is_set():
+                break
+            if model is not None:
+                solutions[k] = self._solve_islands(model, job, reporter(k), cancel)
+            else:
+                job['workers'] = self.workers
+                solutions[k] = solve_sheet(job, reporter(k), cancel)
+        return solutions
+
+    def _solve_anytime_parallel(self, jobs, solutions, unplaced, callback, cancel):
+        # One sheet per worker process; progress is reported per finished
+        # sheet, and the workers see cancellation through a shared token.
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager, ProcessPoolExecutor(
+            max_workers=min(self.workers, len(jobs)), mp_context=context,
+        ) as pool:
+            shared = CancelToken(event=manager.Event())
+            shared.deadline = cancel.deadline
+            pending = {pool_submit(pool, solve_sheet, job, None, shared): k for k, job in enumerate(jobs)}
+            finished = 0
+            while pending:
+                # Short waits, so a Stop reaches the workers promptly
+                done, _ = wait(pending, 0.1, FIRST_COMPLETED)
+                if cancel.is_set():
+                    shared.cancel()
+                for future in done:
+                    solutions[pending.pop(future)] = pool_result(future)
+                    finished += 1
+                    if callback is not None:
+                        callback(self._progress(jobs, solutions, unplaced), finished / len(jobs))
+        return solutions
+
+    def _progress(self, jobs, solutions, unplaced):
+        # Best-so-far layout for the progress callback, skipping validation
+        layout = self._layout(jobs, [best for best, _ in solutions], unplaced, validate=False)
+        layout['stats'] = {'fitness_cache': cache_stats([stats for _, stats in solutions])}
+        return layout
+
+    @timed('nest')
+    def nest(self, parts, sheets, callback=None, cancel=None):
+        # parts: list of part dicts (or bare geometries); a part's
+        #        `quantity` nests that many copies sharing its geometry
+        # sheets: list of dicts {width, height, name, quantity[, cost]}
+        # callback(result, fraction) receives best-so-far layouts (anytime mode)
+        # cancel: CancelToken stopping the run with the current best
+        parts = expand_quantities(parts)
+        with span('nest.assign'):
+            assignments, unplaced = assign_parts(
+                parts, sheets, self.rotation_angles,
+                self.ga_options['spacing'], self.ga_options['margin'])
+        unplaced = [parts[i] for i in unplaced]
+        # One independent stream per sheet, whichever worker solves it
+        root = seed_sequence(self.seed)
+        jobs = []
+        for assignment, seed in zip(assignments, root.spawn(len(assignments))):
+            jobs.append({
+                'parts': [parts[i] for i in assignment['parts']],
+                'sheet': assignment['sheet'],
+                'order': assignment['order'],
+                'rot': assignment['rot'],
+                'pos': assignment['pos'],
+                'seed': seed,
+                'population_size': self.population_size,
+                'generations': self.generations,
+                'rotation_angles': self.rotation_angles,
+                'ga_options': self.ga_options,
+            })
+        if callback is None and cancel is None and not self.time_limit:
+            solutions = self._solve(jobs)
+        else:
+            if cancel is None:
+                cancel = CancelToken()
+            if self.time_limit and cancel.deadline is None:
+                cancel.deadline = time.monotonic() + self.time_limit
+            solutions = self._solve_anytime(jobs, unplaced, callback, cancel)
+        with span('nest.layout'):
+            result = self._layout(jobs, [best for best, _ in solutions], unplaced)
+        result['stats'] = {'fitness_cache': cache_stats([stats for _, stats in solutions])}
+        result['seed'] = root.entropy
+        return result
+
+    def _layout(self, jobs, solutions, unplaced, validate=True):
+        # validate: check every sheet at full resolution (see core.collision)
+        layouts = []
+        part_area = sheet_area = 0.0
+        for job, genome in zip(jobs, solutions):
+            sheet = job['sheet']
+            area = sum(part_geometry(p).area for p in job['parts'])
+            part_area += area
+            sheet_area += sheet['width'] * sheet['height']
+            genes = to_genes(genome, job['parts'], self.rotation_angles)
+            layout = {
+                'sheet': sheet,
+                'genes': genes,
+                'efficiency': area / (sheet['width'] * sheet['height']),
+            }
+            if validate:
+                layout['violations'] = validate_layout(
+                    genes, sheet, self.ga_options['spacing'], self.ga_options['margin'], self.tolerance,
+                    nfp_cache=self.nfp_cache)
+            layouts.append(layout)
+        result = {
+            'sheets': layouts,
+            'unplaced': unplaced,
+            'efficiency': part_area / sheet_area if sheet_area else 0.0,
+            'cost': sum(sheet_cost(l['sheet']) for l in layouts),
+        }
+        if validate:
+            result['valid'] = not any(v for l in layouts for v in l['violations'].values())
         return result
@@ -1,36 +1,70 @@
 # ui/nesting_tab.py
 
+import contextlib
+import os
+import time
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFrame,
     QLabel, QGroupBox, QFormLayout, QDoubleSpinBox, QComboBox,
     QSpinBox, QMessageBox, QProgressBar, QSplitter, QTableWidget,
-    QTableWidgetItem, QGraphicsView, QGraphicsScene
+    QTableWidgetItem, QGraphicsScene
 )
-from PyQt6.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal, QObject
-from core.nesting_engine import NestingEngine
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from core.instrumentation import format_summary, profiled, recording
+from core.nesting_engine import NestingEngine, CancelToken, ISLAND_STRATEGY
+from ui.rendering import GeometryView, PathCache, draw_layouts
 
 
-class NestingWorker(QObject, QRunnable):
+class NestingWorker(QThread):
     progress = pyqtSignal(int)
+    intermediate_ready = pyqtSignal(object)
     result_ready = pyqtSignal(object)
 
-    def __init__(self, parts, sheets, settings):
+    def __init__(self, parts, sheets, settings, strategy=None):
         super().__init__()
         self.parts = parts
         self.sheets = sheets
         self.settings = settings
+        self.strategy = strategy
+        self.cancel_token = CancelToken()
+
+    def cancel(self):
+        # Picked up between generations; the best layout so far is still emitted
+        self.cancel_token.cancel()
+
+    def report(self, result, fraction):
+        self.progress.emit(int(fraction * 100))
+        self.intermediate_ready.emit(result)
 
     def run(self):
-        engine = NestingEngine(self.settings)
-        result = engine.nest(self.parts, self.sheets)
+        # Optional trace/cProfile dumps, named after the run's start time
+        profiling = self.settings.get('profiling', {})
+        trace, profile = profiling.get('trace', False), profiling.get('cprofile', False)
+        stem = None
+        if trace or profile:
+            out = os.path.expanduser(profiling.get('output_dir') or '.')
+            os.makedirs(out, exist_ok=True)
+            stem = os.path.join(out, time.strftime('nesting-%Y%m%d-%H%M%S'))
+        engine = NestingEngine(self.settings, self.strategy)
+        with recording() if trace else contextlib.nullcontext() as recorder, \
+                profiled(stem + '.prof' if profile else None):
+            result = engine.nest(self.parts, self.sheets, self.report, self.cancel_token)
+        if recorder is not None:
+            result['stats']['profile'] = recorder.summary()
+            recorder.save(stem + '.json')
+        self.progress.emit(100)
         self.result_ready.emit(result)
 
 
 class NestingTab(QWidget):
-    def __init__(self, settings):
+    def __init__(self, settings, mainwindow=None):
         super().__init__()
         self.settings = settings
-        self.threadpool = QThreadPool()
+        self.mainwindow = mainwindow
+        self.worker = None
+        # Part outlines as painter paths, reused across redraws
+        self.path_cache = PathCache()
         self._init_ui()
 
     def _init_ui(self):
@@ -45,8 +79,8 @@ class NestingTab(QWidget):
         self.spacing_input.setValue(self.settings['spacing']['part_to_part'])
         self.margin_input = QDoubleSpinBox()
         self.margin_input.setValue(self.settings['spacing']['margin'])
-        strategy_combo = QComboBox()
-        strategy_combo.addItems(['Max Efficiency', 'Balanced', 'Repeat Preferences'])
+        self.strategy_combo = QComboBox()
+        self.strategy_combo.addItems(['Max Efficiency', 'Balanced', 'Repeat Preferences', ISLAND_STRATEGY])
         toolbar.addWidget(start_btn)
         toolbar.addWidget(stop_btn)
         toolbar.addWidget(QLabel('Part to Part:'))
@@ -54,7 +88,7 @@ class NestingTab(QWidget):
         toolbar.addWidget(QLabel('Margin:'))
         toolbar.addWidget(self.margin_input)
         toolbar.addWidget(QLabel('Strategy:'))
-        toolbar.addWidget(strategy_combo)
+        toolbar.addWidget(self.strategy_combo)
         layout.addLayout(toolbar)
 
         # Splitter for results and preview
@@ -66,7 +100,7 @@ class NestingTab(QWidget):
         # Layout preview
         view_frame = QFrame()
         view_layout = QVBoxLayout(view_frame)
-        self.graphic_view = QGraphicsView()
+        self.graphic_view = GeometryView()
         self.graphic_scene = QGraphicsScene()
         self.graphic_view.setScene(self.graphic_scene)
         view_layout.addWidget(self.graphic_view)
@@ -75,24 +109,71 @@ class NestingTab(QWidget):
 
         self.progress = QProgressBar()
         layout.addWidget(self.progress)
+        self.stats_label = QLabel()
+        layout.addWidget(self.stats_label)
 
     def start_nesting(self):
-        # Dummy parts and sheets
-        parts = []  # to be loaded from previous tabs
-        sheets = []
-        worker = NestingWorker(parts, sheets, self.settings)
-        worker.result_ready.connect(self.on_result)
-        self.threadpool.start(worker)
+        self.settings['spacing']['part_to_part'] = self.spacing_input.value()
+        self.settings['spacing']['margin'] = self.margin_input.value()
+        parts = self.mainwindow.parts_tab.parts if self.mainwindow else []
+        sheets = self.mainwindow.sheets_tab.sheets if self.mainwindow else []
+        if not sheets:
+            QMessageBox.warning(self, 'Nesting', 'Define at least one sheet first.')
+            return
+        if self.worker is not None:
+            QMessageBox.warning(self, 'Nesting', 'Nesting is already running.')
+            return
+        self.progress.setValue(0)
+        self.path_cache.clear()
+        self.graphic_scene.clear()
+        self.worker = NestingWorker(parts, sheets, self.settings, self.strategy_combo.currentText())
+        self.worker.progress.connect(self.progress.setValue)
+        self.worker.intermediate_ready.connect(self.show_layouts)
+        self.worker.result_ready.connect(self.on_result)
+        self.worker.start()
 
     def stop_nesting(self):
-        self.threadpool.clear()
-        QMessageBox.information(self, 'Stop', 'Nesting stopped.')
+        # Ask the running job to finish early; on_result shows its best layout
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def show_layouts(self, result):
+        # Display one row per consumed sheet and its efficiency
+        self.results_table.setRowCount(0)
+        for i, layout in enumerate(result['sheets'], start=1):
+            row = self.results_table.rowCount()
+            self.results_table.insertRow(row)
+            name = layout['sheet'].get('name', f'Sheet {i}')
+            self.results_table.setItem(row, 0, QTableWidgetItem(f'{i}: {name}'))
+            self.results_table.setItem(row, 1, QTableWidgetItem(f"{layout['efficiency']:.2%}"))
+        fit = not self.graphic_scene.items()
+        draw_layouts(self.graphic_scene, result, self.path_cache)
+        if fit:
+            self.graphic_view.fit()
+        self.show_stats(result.get('stats', {}))
+
+    def show_stats(self, stats):
+        # Fitness cache counters, live during a run; the profile once it ends
+        lines = []
+        cache = stats.get('fitness_cache')
+        if cache:
+            lines.append(f"Fitness cache: {cache['hits']} hits / {cache['misses']} misses ({cache['hit_rate']:.1%})")
+        if stats.get('profile'):
+            lines.append(format_summary(stats['profile']))
+        self.stats_label.setText('\n'.join(lines))
 
     def on_result(self, result):
-        # Display result in table and preview
-        row = self.results_table.rowCount()
-        self.results_table.insertRow(row)
-        self.results_table.setItem(row, 0, QTableWidgetItem('Solution 1'))
-        self.results_table.setItem(row, 1, QTableWidgetItem(str(round( result,2))))
-        # TODO: draw layout
-        QMessageBox.information(self, 'Done', 'Nesting completed.')
+        cancelled = self.worker is not None and self.worker.cancel_token.is_set()
+        self.worker = None
+        self.show_layouts(result)
+        if self.mainwindow is not None:
+            self.mainwindow.export_tab.show_result(result)
+        status = 'stopped' if cancelled else 'completed'
+        message = f"Nesting {status} on {len(result['sheets'])} sheets, efficiency {result['efficiency']:.2%}."
+        if result.get('seed') is not None:
+            message += f"\nSeed: {result['seed']}"
+        if result['unplaced']:
+            message += f"\n{len(result['unplaced'])} parts did not fit the sheet inventory."
+        if not result.get('valid', True):
+            message += "\nWarning: the layout has overlapping parts or parts outside the sheet."
+        QMessageBox.information(self, 'Done', message)
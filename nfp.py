@@ -0,0 +1,314 @@
+# core/nfp.py
+
+import hashlib
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+from shapely import wkb
+from shapely.affinity import rotate, translate
+from shapely.geometry import Polygon, box
+
+from core.geometry_levels import PartLevels, part_geometry
+from core.rotations import RotationTable
+
+
+def canonical(geom):
+    """Translate a geometry so its bounding box starts at the origin."""
+    minx, miny, _, _ = geom.bounds
+    return translate(geom, -minx, -miny)
+
+
+def geometry_hash(geom, precision=6):
+    """Content hash of a part outline, independent of where it was drawn."""
+    geom = canonical(geom)
+    h = hashlib.sha1()
+    for ring in [geom.exterior, *geom.interiors] if isinstance(geom, Polygon) else []:
+        # Adding 0.0 turns -0.0 into 0.0, so both hash alike
+        h.update((np.round(shapely.get_coordinates(ring), precision) + 0.0).tobytes())
+        h.update(b'|')
+    if not isinstance(geom, Polygon):
+        h.update(geom.wkb)
+    return h.hexdigest()
+
+
+def _is_convex(coords):
+    sign = 0
+    n = len(coords)
+    for i in range(n):
+        (x0, y0), (x1, y1), (x2, y2) = coords[i], coords[(i + 1) % n], coords[(i + 2) % n]
+        cross = (x1 - x0) * (y2 - y1) - (y1 - y0) * (x2 - x1)
+        if abs(cross) < 1e-12:
+            continue
+        if sign == 0:
+            sign = 1 if cross > 0 else -1
+        elif (cross > 0) != (sign > 0):
+            return False
+    return True
+
+
+def _point_in_triangle(p, a, b, c):
+    def side(p1, p2, p3):
+        return (p1[0] - p3[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p3[1])
+    d1, d2, d3 = side(p, a, b), side(p, b, c), side(p, c, a)
+    has_neg = d1 < 0 or d2 < 0 or d3 < 0
+    has_pos = d1 > 0 or d2 > 0 or d3 > 0
+    return not (has_neg and has_pos)
+
+
+def _polygons(geom):
+    if isinstance(geom, Polygon):
+        return [geom]
+    return [g for g in getattr(geom, 'geoms', []) if isinstance(g, Polygon)]
+
+
+def convex_pieces(geom):
+    """
+    Split the outer rings of a (multi)polygon into convex pieces (ear clipping).
+    Holes are ignored: the no-fit polygon only describes outer contact.
+    """
+    pieces = []
+    for polygon in _polygons(geom):
+        pieces.extend(_ear_clip(polygon.simplify(0)))
+    return pieces
+
+
+def _ear_clip(polygon):
+    coords = list(polygon.exterior.coords)[:-1]
+    if polygon.exterior.is_ccw is False:
+        coords.reverse()
+    if len(coords) < 3:
+        return []
+    if _is_convex(coords):
+        return [coords]
+
+    pieces = []
+    idx = list(range(len(coords)))
+    guard = 0
+    while len(idx) > 3 and guard < 10 * len(coords):
+        guard += 1
+        for k in range(len(idx)):
+            i0, i1, i2 = idx[k - 1], idx[k], idx[(k + 1) % len(idx)]
+            a, b, c = coords[i0], coords[i1], coords[i2]
+            cross = (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0])
+            if cross <= 0:
+                continue
+            if any(_point_in_triangle(coords[j], a, b, c) for j in idx if j not in (i0, i1, i2)):
+                continue
+            pieces.append([a, b, c])
+            del idx[k]
+            break
+        else:
+            break
+    if len(idx) >= 3:
+        pieces.append([coords[i] for i in idx])
+    return pieces
+
+
+def minkowski_nfp(stationary, orbiting):
+    """
+    No-fit polygon of `orbiting` around `stationary`: the set of reference
+    positions of `orbiting` (its local origin) at which the two overlap.
+    Computed as the Minkowski sum stationary ⊕ (-orbiting) over convex pieces.
+    """
+    return _minkowski(_piece_arrays(stationary), _piece_arrays(orbiting))
+
+
+def _piece_arrays(geom):
+    return [np.asarray(piece, dtype=float) for piece in convex_pieces(geom)]
+
+
+def _minkowski(pieces_a, pieces_b):
+    # One convex hull per pair of pieces, all built in a single vectorized call
+    if not pieces_a or not pieces_b:
+        return Polygon()
+    sums = [(a[:, None, :] - b[None, :, :]).reshape(-1, 2) for a in pieces_a for b in pieces_b]
+    indices = np.repeat(np.arange(len(sums)), [len(points) for points in sums])
+    hulls = shapely.convex_hull(shapely.multipoints(np.concatenate(sums), indices=indices))
+    return shapely.union_all(hulls)
+
+
+def _rotate_pieces(pieces, angle):
+    # Rotation about the origin keeps every piece convex
+    theta = math.radians(angle)
+    c, s = math.cos(theta), math.sin(theta)
+    matrix = np.array([[c, s], [-s, c]])
+    return [piece @ matrix for piece in pieces]
+
+
+def inner_fit_polygon(geom, width, height, margin=0.0):
+    """
+    Inner-fit polygon of a part against a rectangular sheet: the reference
+    positions keeping the part fully on the sheet. None if it cannot fit.
+    """
+    minx, miny, maxx, maxy = geom.bounds
+    x0, y0 = margin - minx, margin - miny
+    x1, y1 = width - margin - maxx, height - margin - maxy
+    if x1 < x0 or y1 < y0:
+        return None
+    return box(x0, y0, x1, y1)
+
+
+class NFPCache:
+    """
+    Two-level cache of no-fit polygons: an in-memory LRU bounded by the
+    WKB size of its entries, backed by a content-addressed directory.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.wkb')
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if self.cache_dir:
+            path = self._path(key)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                geom = wkb.loads(data)
+                self._remember(key, geom, len(data))
+                self.disk_hits += 1
+                return geom
+        self.misses += 1
+        return None
+
+    def put(self, key, geom):
+        data = geom.wkb
+        self._remember(key, geom, len(data))
+        if self.cache_dir:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def _remember(self, key, geom, nbytes):
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = (geom, nbytes)
+        self.size += nbytes
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+
+class NFPEngine:
+    """
+    Serves no-fit and inner-fit polygons for rotated parts.
+
+    Parts are addressed in the same frame the GA uses: rotated about the
+    origin, then shifted so the rotated bounding box starts at (0, 0).
+    NFPs are cached per (part, part, relative angle) in the first part's
+    unrotated frame and rotated into place on lookup, so every angle pair
+    with the same difference shares one entry.
+
+    NFPs are built from each part's simplified offset outline (see
+    core.geometry_levels), so they already keep `spacing` between parts
+    and stay cheap for outlines with thousands of vertices. `levels`
+    optionally passes those PartLevels in, one per part, if the caller
+    already built them.
+    """
+    def __init__(self, parts, rotation_angles, cache=None, spacing=0.0, tolerance=0.0, levels=None):
+        self.angles = list(rotation_angles)
+        self.cache = cache if cache is not None else NFPCache()
+        self.shapes = []
+        self.outlines = []
+        self.keys = []
+        # Convex pieces of each outline by key, split on first use
+        self._pieces = {}
+        pad = f'{spacing / 2 + tolerance:.6f}:{tolerance:.6f}'
+        built = {}
+        # Held in a list so ids stay unique while building
+        geometries = [part_geometry(p) for p in parts]
+        for k, geom in enumerate(geometries):
+            # Copies of a part share one geometry and so one shape, outline and key
+            if id(geom) not in built:
+                minx, miny, _, _ = geom.bounds
+                part_levels = levels[k] if levels is not None else PartLevels(geom, spacing, tolerance)
+                # Outlines share the full geometry's frame
+                shape = translate(geom, -minx, -miny)
+                built[id(geom)] = (shape, translate(part_levels.outline, -minx, -miny),
+                                   f'{geometry_hash(shape)}:{pad}')
+            shape, outline, key = built[id(geom)]
+            self.shapes.append(shape)
+            self.outlines.append(outline)
+            self.keys.append(key)
+        # offsets[i][angle]: shift applied after rotating part i by angle
+        self.table = RotationTable(self.shapes, self.angles)
+        self.offsets = [{angle: tuple(-self.table.bounds[a, i, :2]) for a, angle in enumerate(self.angles)}
+                        for i in range(len(self.shapes))]
+
+    def placed_shape(self, i, angle):
+        return self.table.geometry(i, angle)
+
+    def _relative_nfp(self, i, j, delta):
+        delta = delta % 360
+        key = hashlib.sha1(f'{self.keys[i]}:{self.keys[j]}:{delta:.6f}'.encode()).hexdigest()
+        geom = self.cache.get(key)
+        if geom is None:
+            geom = _minkowski(self.pieces(i), _rotate_pieces(self.pieces(j), delta))
+            self.cache.put(key, geom)
+        return geom
+
+    def pieces(self, i):
+        """Convex pieces of part i's outline, as (k, 2) coordinate arrays."""
+        key = self.keys[i]
+        if key not in self._pieces:
+            self._pieces[key] = _piece_arrays(self.outlines[i])
+        return self._pieces[key]
+
+    def nfp(self, i, angle_i, j, angle_j):
+        """Reference positions of part j (at angle_j) overlapping part i (at angle_i, placed at 0,0)."""
+        geom = rotate(self._relative_nfp(i, j, angle_j - angle_i), angle_i, origin=(0, 0))
+        (ax, ay), (bx, by) = self.offsets[i][angle_i], self.offsets[j][angle_j]
+        return translate(geom, ax - bx, ay - by)
+
+    def overlapping(self, i, angle_i, j, angle_j, offset):
+        """
+        For pairs of parts, whether part j (at angle_j), placed `offset`
+        from part i (at angle_i) in the GA frame, comes inside i's outline:
+        True where the offset falls inside their no-fit polygon.
+        """
+        offset = np.asarray(offset, dtype=float).reshape(-1, 2)
+        nfps = np.empty(len(offset), dtype=object)
+        shift = np.empty_like(offset)
+        for k, (a, angle_a, b, angle_b) in enumerate(zip(i, angle_i, j, angle_j)):
+            nfps[k] = self._relative_nfp(a, b, angle_b - angle_a)
+            (ax, ay), (bx, by) = self.offsets[a][angle_a], self.offsets[b][angle_b]
+            shift[k] = ax - bx, ay - by
+        # Take each offset back into its cached NFP's frame (see nfp())
+        # rather than moving the polygons to the offsets
+        theta = np.radians(np.asarray(angle_i, dtype=float))
+        c, s = np.cos(theta), np.sin(theta)
+        x, y = (offset - shift).T
+        return shapely.contains_xy(nfps, c * x + s * y, c * y - s * x)
+
+    def ifp(self, i, angle, width, height, margin=0.0):
+        return inner_fit_polygon(self.placed_shape(i, angle), width, height, margin)
+
+    def precompute(self):
+        """Fill the cache for every part pair and relative rotation."""
+        deltas = sorted({(b - a) % 360 for a in self.angles for b in self.angles})
+        seen = set()
+        for i in range(len(self.shapes)):
+            for j in range(len(self.shapes)):
+                for delta in deltas:
+                    pair = (self.keys[i], self.keys[j], delta)
+                    if pair not in seen:
+                        seen.add(pair)
+                        self._relative_nfp(i, j, delta)
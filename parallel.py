@@ -0,0 +1,86 @@
+# core/parallel.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.duplicates import instance_geometries
+from core.fitness import FitnessEvaluator
+
+# Per-process evaluator, built once by the pool initializer.
+_worker_evaluator = None
+
+
+def _init_worker(geometries, sheet, rotation_angles, spacing, margin):
+    global _worker_evaluator
+    _worker_evaluator = FitnessEvaluator(geometries, sheet, rotation_angles, spacing, margin)
+
+
+def _score_chunk(rot, pos, base):
+    return _worker_evaluator.score(rot, pos, base)
+
+
+def _decode_and_score_chunk(order, rot, base):
+    return _worker_evaluator.decode_and_score(order, rot, base)
+
+
+class ParallelEvaluator:
+    """
+    Drop-in replacement for FitnessEvaluator that fans a generation out
+    over a process pool.
+
+    Part outlines reach each worker once through the pool initializer; per
+    generation only the compact (rotation, position) arrays are sent. Each
+    chunk is scored by the same pure function and results are reassembled
+    in population order, so scores do not depend on the worker count.
+    """
+    def __init__(self, parts, sheet, rotation_angles, workers, spacing=0.0, margin=0.0):
+        self.local = FitnessEvaluator(parts, sheet, rotation_angles, spacing, margin)
+        self.workers = workers
+        geometries = instance_geometries(parts)
+        # Spawn rather than fork: the engine usually runs inside a Qt thread pool.
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(geometries, sheet, list(rotation_angles), spacing, margin),
+        )
+
+    @property
+    def decoder(self):
+        return self.local.decoder
+
+    def _chunks(self, n):
+        bounds = np.linspace(0, n, self.workers + 1).astype(int)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    @staticmethod
+    def _slice(base, a, b):
+        return None if base is None else tuple(np.asarray(x)[a:b] for x in base)
+
+    def _map(self, fn, first, second, base):
+        futures = [self.pool.submit(fn, first[a:b], second[a:b], self._slice(base, a, b))
+                   for a, b in self._chunks(len(first))]
+        results = [f.result() for f in futures]
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def evaluate(self, rot, pos):
+        return self.score(rot, pos)[0]
+
+    def score(self, rot, pos, base=None):
+        rot = np.asarray(rot)
+        pos = np.asarray(pos)
+        if len(rot) < 2 * self.workers:
+            return self.local.score(rot, pos, base)
+        return self._map(_score_chunk, rot, pos, base)
+
+    def decode_and_score(self, order, rot, base=None):
+        order = np.asarray(order)
+        rot = np.asarray(rot)
+        if len(rot) < 2 * self.workers:
+            return self.local.decode_and_score(order, rot, base)
+        return self._map(_decode_and_score_chunk, order, rot, base)
+
+    def close(self):
+        self.pool.shutdown()
@@ -1,21 +1,28 @@
 # ui/parts_tab.py
 
 import os
-import ezdxf
-import math
-from shapely.geometry import MultiPoint
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QGraphicsView,
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QGraphicsScene, QTableWidget, QTableWidgetItem, QTextEdit,
     QFrame, QFileDialog, QSplitter, QLabel
 )
 from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush
+from shapely.geometry import Polygon
+from core.duplicates import DEFAULT_DUPLICATE_TOLERANCE, DuplicateIndex
+from ui.dialogs.cad_importer_dialog import ImportWorker
+from ui.rendering import GeometryView, PathCache, add_geometry
 
 class PartsTab(QWidget):
     def __init__(self, settings, mainwindow):
         super().__init__()
         self.settings = settings
         self.mainwindow = mainwindow
+        self.parts = []
+        self.duplicates = None
+        self.rows = {}
+        self.worker = None
+        self.path_cache = PathCache()
         self._init_ui()
 
     def _init_ui(self):
@@ -34,10 +41,10 @@ class PartsTab(QWidget):
         # Upper: raw and imported preview
         preview_frame = QFrame()
         preview_layout = QHBoxLayout(preview_frame)
-        self.raw_view = QGraphicsView()
+        self.raw_view = GeometryView()
         self.raw_scene = QGraphicsScene()
         self.raw_view.setScene(self.raw_scene)
-        self.imported_view = QGraphicsView()
+        self.imported_view = GeometryView()
         self.imported_scene = QGraphicsScene()
         self.imported_view.setScene(self.imported_scene)
         preview_layout.addWidget(self.raw_view)
@@ -49,6 +56,7 @@ class PartsTab(QWidget):
         lower_layout = QHBoxLayout(lower_frame)
         self.parts_table = QTableWidget(0, 4)
         self.parts_table.setHorizontalHeaderLabels(['Name', 'Width', 'Height', 'Qty'])
+        self.parts_table.itemChanged.connect(self.on_quantity_edited)
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
         lower_layout.addWidget(self.parts_table)
@@ -64,64 +72,79 @@ class PartsTab(QWidget):
         if not filepaths:
             return
 
+        if self.worker is not None:
+            self.log_text.append('Import already running')
+            return
+
         # clear previous
         self.raw_scene.clear()
         self.imported_scene.clear()
         self.parts_table.setRowCount(0)
         self.log_text.clear()
-
-        for filepath in filepaths:
-            try:
-                doc = ezdxf.readfile(filepath)
-                msp = doc.modelspace()
-
-                # draw raw lines
-                for e in msp.query('LINE'):
-                    x1, y1 = e.dxf.start
-                    x2, y2 = e.dxf.end
-                    self.raw_scene.addLine(x1, -y1, x2, -y2)
-
-                coords = []
-                for entity in msp:
-                    et = entity.dxftype()
-                    if et == 'LINE':
-                        s = entity.dxf.start
-                        e = entity.dxf.end
-                        coords.extend([(s.x, s.y), (e.x, e.y)])
-                    elif et == 'LWPOLYLINE':
-                        coords.extend([(p[0], p[1]) for p in entity])
-                    elif et == 'CIRCLE':
-                        c = entity.dxf.center
-                        r = entity.dxf.radius
-                        for i in range(32):
-                            a = 2*math.pi*i/32
-                            coords.append((c.x+ r*math.cos(a), c.y+ r*math.sin(a)))
-
-                if len(coords) < 3:
-                    self.log_text.append(f'Warning: {os.path.basename(filepath)} insufficient geometry')
+        self.parts = []
+        self.rows = {}
+        self.path_cache.clear()
+        # Identical parts across all files of this import become one row with a quantity
+        geometry = self.settings.get('geometry', {})
+        self.duplicates = None
+        if geometry.get('merge_duplicates', True):
+            self.duplicates = DuplicateIndex(geometry.get('duplicate_tolerance', DEFAULT_DUPLICATE_TOLERANCE))
+
+        # Files are parsed in worker processes; each one is shown as it lands
+        cache_dir = self.settings.get('file_paths', {}).get('import_cache')
+        self.worker = ImportWorker(filepaths, cache_dir=os.path.expanduser(cache_dir) if cache_dir else None)
+        self.worker.file_processed.connect(self.on_file_processed)
+        self.worker.error_occurred.connect(self.log_text.append)
+        self.worker.import_finished.connect(self.on_import_finished)
+        self.worker.start()
+
+    def on_file_processed(self, filename, parts):
+        if not parts:
+            self.log_text.append(f'Warning: {filename} insufficient geometry')
+            return
+        merged = 0
+        for part in parts:
+            if self.duplicates is not None:
+                part, duplicate = self.duplicates.add(part)
+                if duplicate:
+                    merged += 1
+                    self.parts_table.item(self.rows[id(part)], 3).setText(str(part['quantity']))
                     continue
-
-                hull = MultiPoint(coords).convex_hull
-                # draw imported hull
-                pts = hull.exterior.coords
-                prev = pts[0]
-                for pt in pts[1:]:
-                    self.imported_scene.addLine(prev[0], -prev[1], pt[0], -pt[1])
-                    prev = pt
-
-                name = os.path.splitext(os.path.basename(filepath))[0]
-                minx, miny, maxx, maxy = hull.bounds
-                width = round(maxx-minx,3)
-                height = round(maxy-miny,3)
-                qty = 1
-
-                row = self.parts_table.rowCount()
-                self.parts_table.insertRow(row)
-                self.parts_table.setItem(row,0,QTableWidgetItem(name))
-                self.parts_table.setItem(row,1,QTableWidgetItem(str(width)))
-                self.parts_table.setItem(row,2,QTableWidgetItem(str(height)))
-                self.parts_table.setItem(row,3,QTableWidgetItem(str(qty)))
-
-                self.log_text.append(f'Success: Imported {name}')
-            except Exception as e:
-                self.log_text.append(f'Error importing {os.path.basename(filepath)}: {e}')
+            geom = part['geometry']
+            # raw: the outline with its holes; imported: the outer contour nested
+            add_geometry(self.raw_scene, self.path_cache, geom, brush=QBrush())
+            add_geometry(self.imported_scene, self.path_cache, Polygon(geom.exterior))
+
+            row = self.parts_table.rowCount()
+            self.parts_table.insertRow(row)
+            self.parts_table.setItem(row,0,QTableWidgetItem(part['name']))
+            self.parts_table.setItem(row,1,QTableWidgetItem(str(round(part['width'],3))))
+            self.parts_table.setItem(row,2,QTableWidgetItem(str(round(part['height'],3))))
+            self.parts_table.setItem(row,3,QTableWidgetItem(str(part.get('quantity', 1))))
+            self.rows[id(part)] = row
+            self.parts.append(part)
+        message = f'Success: Imported {filename} ({len(parts)} parts'
+        if merged:
+            message += f', {merged} merged as duplicates'
+        self.log_text.append(message + ')')
+
+    def on_quantity_edited(self, item):
+        # Qty is editable: the part is stored once and nested that many times
+        if item.column() != 3 or item.row() >= len(self.parts):
+            return
+        part = self.parts[item.row()]
+        try:
+            quantity = int(item.text())
+        except ValueError:
+            quantity = -1
+        if quantity < 0:
+            item.setText(str(part.get('quantity', 1)))
+            return
+        part['quantity'] = quantity
+
+    def on_import_finished(self, parts):
+        self.worker = None
+        copies = sum(part.get('quantity', 1) for part in self.parts)
+        self.log_text.append(f'Import completed: {len(self.parts)} distinct parts, {copies} in total')
+        self.raw_view.fit()
+        self.imported_view.fit()
@@ -0,0 +1,164 @@
+# core/placement.py
+
+import bisect
+import math
+
+import numpy as np
+
+from core.instrumentation import count
+
+
+class GridIndex:
+    """
+    Uniform-grid spatial hash over axis-aligned boxes. Inserting and
+    querying touch only the cells a box covers, so the cost of a query
+    depends on the local crowding, not on how many boxes were placed.
+    """
+    def __init__(self, cell):
+        self.cell = max(float(cell), 1e-9)
+        self.cells = {}
+        self.boxes = []
+
+    def _span(self, x0, y0, x1, y1):
+        c = self.cell
+        return range(math.floor(x0 / c), math.floor(x1 / c) + 1), range(math.floor(y0 / c), math.floor(y1 / c) + 1)
+
+    def insert(self, x0, y0, x1, y1):
+        idx = len(self.boxes)
+        self.boxes.append((x0, y0, x1, y1))
+        xs, ys = self._span(x0, y0, x1, y1)
+        for i in xs:
+            for j in ys:
+                self.cells.setdefault((i, j), []).append(idx)
+        return idx
+
+    def intersects(self, x0, y0, x1, y1, eps=1e-9):
+        """True if the open box overlaps any stored box."""
+        xs, ys = self._span(x0, y0, x1, y1)
+        for i in xs:
+            for j in ys:
+                for idx in self.cells.get((i, j), ()):
+                    bx0, by0, bx1, by1 = self.boxes[idx]
+                    if x0 < bx1 - eps and bx0 < x1 - eps and y0 < by1 - eps and by0 < y1 - eps:
+                        return True
+        return False
+
+
+class BottomLeftDecoder:
+    """
+    Deterministic bottom-left-fill decoder: turns a placement order and a
+    rotation per part into positions on a sheet.
+
+    Parts are placed one by one at the lowest, then left-most, candidate
+    point where their rotated bounding box (grown by the part-to-part
+    spacing) fits inside the sheet margins without touching anything
+    already placed. Candidates are kept sorted, placed footprints live in
+    a GridIndex, and candidates that can no longer take even the smallest
+    part are dropped as soon as they are seen.
+
+    Given an already decoded `base` individual, the order slots it shares
+    with the one being decoded are replayed from its positions instead of
+    searched: a mutation late in the order only searches the parts after it.
+    """
+    def __init__(self, sizes, sheet, spacing=0.0, margin=0.0):
+        # sizes: (angles, parts, 2) rotated bounding-box extents
+        self.sizes = np.asarray(sizes, dtype=float)
+        self.width = float(sheet['width'])
+        self.height = float(sheet['height'])
+        self.spacing = float(spacing)
+        self.margin = float(margin)
+        flat = self.sizes.reshape(-1, 2)
+        typical = np.median(flat[flat.max(axis=1) > 0], axis=0) if flat.size and flat.max() > 0 else (1.0, 1.0)
+        self.cell = float(max(typical)) + self.spacing
+
+    def decode(self, order, rot, base=None):
+        """
+        Place parts in `order` with rotation indices `rot` (indexed by part).
+        Returns (positions (N, 2), placed (N,) bool). Parts that do not fit
+        are lined up to the right of the sheet so fitness sees them as waste.
+
+        `base` is an optional (order, rot, positions) of an individual this
+        decoder laid out before; the leading slots holding the same part at
+        the same rotation are copied from it.
+        """
+        order = np.asarray(order)
+        rot = np.asarray(rot)
+        n = len(order)
+        pos = np.zeros((n, 2))
+        placed = np.zeros(n, dtype=bool)
+        index = GridIndex(self.cell)
+        x_max = self.width - self.margin
+        y_max = self.height - self.margin
+        overflow = self.width + self.spacing
+        # Candidates are (y, x, failed_w, failed_h), kept sorted bottom-left
+        # first. Placed parts never move, so once a candidate has rejected a
+        # footprint it rejects every footprint at least as large in both
+        # directions; those are skipped without touching the index.
+        candidates = [(self.margin, self.margin, math.inf, math.inf)]
+        sizes = self.sizes[rot, np.arange(n)]
+        min_w, min_h = sizes.min(axis=0).tolist() if n else (0.0, 0.0)
+        # Plain floats: NumPy scalars are several times slower in this loop.
+        sizes = sizes.tolist()
+        min_fw, min_fh = min_w + self.spacing, min_h + self.spacing
+
+        def put(k, part, x, y, fw, fh):
+            del candidates[k]
+            pos[part] = (x, y)
+            placed[part] = True
+            index.insert(x, y, x + fw, y + fh)
+            for cy, cx in ((y, x + fw), (y + fh, x)):
+                # Drop corners that cannot take even the smallest part.
+                if cx + min_w <= x_max + 1e-9 and cy + min_h <= y_max + 1e-9:
+                    bisect.insort(candidates, (cy, cx, math.inf, math.inf))
+
+        reused = 0
+        if base is not None:
+            # A shared prefix is laid out exactly as in `base`: each of its
+            # parts went to the first candidate that fit, and the corners it
+            # left behind are the same. Replay it slot by slot, stopping at
+            # the first part `base` had to spill off the sheet.
+            base_order, base_rot, base_pos = (np.asarray(b) for b in base)
+            same = (order == base_order) & (rot[order] == base_rot[base_order])
+            shared = n if same.all() else int(np.argmin(same))
+            for part, (x, y) in zip(order[:shared].tolist(), base_pos[order[:shared]].tolist()):
+                w, h = sizes[part]
+                k = bisect.bisect_left(candidates, (y, x))
+                if (k == len(candidates) or candidates[k][:2] != (y, x)
+                        or x + w > x_max + 1e-9 or y + h > y_max + 1e-9):
+                    break
+                put(k, part, x, y, w + self.spacing, h + self.spacing)
+                reused += 1
+        count('placement.reused', reused)
+        count('placement.searched', n - reused)
+
+        for part in order[reused:].tolist():
+            w, h = sizes[part]
+            fw, fh = w + self.spacing, h + self.spacing
+            k = 0
+            while k < len(candidates):
+                y, x, bad_w, bad_h = candidates[k]
+                if fw >= bad_w and fh >= bad_h:
+                    k += 1
+                    continue
+                if index.intersects(x, y, x + min_fw, y + min_fh):
+                    # Wedged in: not even the smallest part fits here any more.
+                    del candidates[k]
+                    continue
+                if x + w <= x_max + 1e-9 and y + h <= y_max + 1e-9 and not index.intersects(x, y, x + fw, y + fh):
+                    break
+                candidates[k] = (y, x, fw, fh)
+                k += 1
+            else:
+                pos[part] = (overflow, 0.0)
+                overflow += fw
+                continue
+            put(k, part, x, y, fw, fh)
+        return pos, placed
+
+    def decode_population(self, order, rot, base=None):
+        # `base` holds one (order, rot, positions) reference per row, or None
+        pos = np.empty(order.shape + (2,))
+        for row in range(len(order)):
+            row_base = None if base is None else tuple(b[row] for b in base)
+            pos[row] = self.decode(order[row], rot[row], row_base)[0]
+        return pos
@@ -0,0 +1,238 @@
+# ui/rendering.py
+
+import math
+
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QBrush, QColor, QPainter, QPainterPath, QPen, QPolygonF
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsScene, QGraphicsView
+
+from core.collision import place
+from core.geometry_levels import part_geometry
+
+LOD_LEVELS = 4      # detail levels per geometry, full detail first
+LOD_RATIO = 4.0     # simplification tolerance grows by this much per level
+MIN_PIXELS = 3.0    # geometries smaller than this on screen are drawn as boxes
+SHEET_GAP = 0.05    # space between sheets, as a fraction of the largest sheet
+
+
+def cosmetic_pen(color, width=1):
+    # Same width in pixels at every zoom
+    pen = QPen(QColor(color), width)
+    pen.setCosmetic(True)
+    return pen
+
+
+PART_PEN = cosmetic_pen(QColor(0, 110, 0))
+PART_BRUSH = QBrush(QColor(0, 150, 0, 60))
+ERROR_PEN = cosmetic_pen(QColor(200, 0, 0), 2)
+ERROR_BRUSH = QBrush(QColor(220, 0, 0, 90))
+SHEET_PEN = cosmetic_pen(QColor(60, 60, 60))
+SHEET_BRUSH = QBrush(QColor(235, 235, 235))
+
+
+def geometry_path(geom):
+    """One QPainterPath for a shapely geometry; holes are cut out by odd-even fill."""
+    path = QPainterPath()
+    path.setFillRule(Qt.FillRule.OddEvenFill)
+    _add_to_path(path, geom)
+    return path
+
+
+def _add_to_path(path, geom):
+    if geom.is_empty:
+        return
+    if hasattr(geom, 'geoms'):
+        for sub in geom.geoms:
+            _add_to_path(path, sub)
+    elif geom.geom_type == 'Polygon':
+        for ring in (geom.exterior, *geom.interiors):
+            path.addPolygon(QPolygonF([QPointF(x, y) for x, y in ring.coords]))
+            path.closeSubpath()
+    elif geom.geom_type in ('LineString', 'LinearRing'):
+        coords = geom.coords
+        path.moveTo(*coords[0])
+        for x, y in coords[1:]:
+            path.lineTo(x, y)
+    elif geom.geom_type == 'Point':
+        path.addEllipse(QPointF(geom.x, geom.y), 2, 2)
+
+
+class LODPaths:
+    """
+    One geometry as QPainterPaths at decreasing detail. Level k is the
+    geometry simplified by `tolerances[k]`; a level is built the first time
+    a zoom asks for it, so zoomed-out views never touch full detail.
+    """
+    def __init__(self, geom, levels=LOD_LEVELS, ratio=LOD_RATIO):
+        self.geom = geom
+        minx, miny, maxx, maxy = geom.bounds if not geom.is_empty else (0, 0, 0, 0)
+        self.rect = QRectF(minx, miny, maxx - minx, maxy - miny)
+        size = max(maxx - minx, maxy - miny)
+        self.tolerances = [0.0] + [size / 1000 * ratio ** k for k in range(levels - 1)]
+        self._paths = [None] * levels
+
+    def level(self, pixel):
+        """Coarsest level whose error stays under half a pixel (`pixel` in scene units)."""
+        k = 0
+        for j, tolerance in enumerate(self.tolerances):
+            if tolerance <= pixel / 2:
+                k = j
+        return k
+
+    def path(self, pixel=0.0):
+        k = self.level(pixel)
+        if self._paths[k] is None:
+            geom = self.geom if k == 0 else self.geom.simplify(self.tolerances[k], preserve_topology=True)
+            self._paths[k] = geometry_path(geom)
+        return self._paths[k]
+
+
+class PathCache:
+    """
+    LODPaths per (geometry, angle), shared by every item that shows the
+    same part the same way round. With an angle the geometry is rotated and
+    moved so its bounding box starts at the origin (the GA frame, see
+    core.collision.place); without one it is drawn where it is.
+    """
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, geom, angle=None):
+        key = (id(geom), None if angle is None else float(angle))
+        entry = self._entries.get(key)
+        # Keeping the geometry alive keeps its id from being reused
+        if entry is None or entry[0] is not geom:
+            shape = geom if angle is None else place(geom, angle, (0.0, 0.0))[0]
+            entry = (geom, LODPaths(shape))
+            self._entries[key] = entry
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class GeometryItem(QGraphicsItem):
+    """
+    Scene item drawing one cached geometry. The scene's BSP index only
+    paints items inside the exposed area, and each paint picks the LOD
+    level for the current zoom; items a few pixels across become boxes.
+    """
+    def __init__(self, paths, pen=PART_PEN, brush=PART_BRUSH, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.pen = pen
+        self.brush = brush
+        rect = paths.rect
+        # Room for the cosmetic outline at any sensible zoom
+        pad = max(rect.width(), rect.height()) * 0.01
+        self._bounds = rect.adjusted(-pad, -pad, pad, pad)
+
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        rect = self.paths.rect
+        if lod <= 0 or max(rect.width(), rect.height()) * lod < MIN_PIXELS:
+            painter.fillRect(rect, self.pen.color())
+            return
+        painter.setPen(self.pen)
+        painter.setBrush(self.brush)
+        painter.drawPath(self.paths.path(1.0 / lod))
+
+
+def add_geometry(scene, cache, geom, pos=(0.0, 0.0), angle=None, pen=PART_PEN, brush=PART_BRUSH):
+    """Add one geometry to a scene as a GeometryItem at `pos`."""
+    item = GeometryItem(cache.get(geom, angle), pen, brush)
+    item.setPos(*pos)
+    scene.addItem(item)
+    return item
+
+
+def draw_parts(scene, cache, geoms, pen=PART_PEN, brush=PART_BRUSH, row_width=None, gap=0.1):
+    """
+    Preview many geometries side by side in rows (no overlap, no cap on
+    the count). Returns the items.
+    """
+    boxes = [g.bounds for g in geoms]
+    sizes = [(b[2] - b[0], b[3] - b[1]) for b in boxes]
+    if not sizes:
+        return []
+    largest = max(max(w, h) for w, h in sizes) or 1.0
+    spacing = largest * gap
+    if row_width is None:
+        # Roughly square overall
+        row_width = max(largest, math.sqrt(sum((w + spacing) * (h + spacing) for w, h in sizes)))
+    items = []
+    x = y = row_height = 0.0
+    for geom, (minx, miny, _, _), (w, h) in zip(geoms, boxes, sizes):
+        if x > 0 and x + w > row_width:
+            x, y, row_height = 0.0, y - row_height - spacing, 0.0
+        items.append(add_geometry(scene, cache, geom, (x - minx, y - h - miny), None, pen, brush))
+        x += w + spacing
+        row_height = max(row_height, h)
+    return items
+
+
+def draw_layouts(scene, result, cache):
+    """
+    Draw every sheet of a NestingEngine.nest() result in a grid, parts at
+    their decoded positions. Parts the validator flagged (overlapping or
+    outside the sheet) are drawn in red.
+    """
+    scene.clear()
+    layouts = result.get('sheets', [])
+    if not layouts:
+        return
+    columns = math.ceil(math.sqrt(len(layouts)))
+    cell_w = max(l['sheet']['width'] for l in layouts) * (1 + SHEET_GAP)
+    cell_h = max(l['sheet']['height'] for l in layouts) * (1 + SHEET_GAP)
+    for k, layout in enumerate(layouts):
+        # y points up in the views, so later rows go below (negative y)
+        ox, oy = (k % columns) * cell_w, -(k // columns) * cell_h
+        sheet = layout['sheet']
+        rect = scene.addRect(QRectF(ox, oy, sheet['width'], sheet['height']), SHEET_PEN, SHEET_BRUSH)
+        rect.setZValue(-1)
+        violations = layout.get('violations') or {}
+        bad = set(violations.get('outside', ()))
+        for i, j in violations.get('collisions', ()):
+            bad.update((i, j))
+        for n, gene in enumerate(layout['genes']):
+            x, y = gene['pos']
+            pen, brush = (ERROR_PEN, ERROR_BRUSH) if n in bad else (PART_PEN, PART_BRUSH)
+            add_geometry(scene, cache, part_geometry(gene['part']), (ox + x, oy + y), gene['angle'], pen, brush)
+
+
+class GeometryView(QGraphicsView):
+    """
+    QGraphicsView for CAD geometry: y axis up, wheel zoom about the
+    cursor, drag to pan, and no per-item painter state saving.
+    """
+    ZOOM_STEP = 1.25
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setOptimizationFlags(QGraphicsView.OptimizationFlag.DontSavePainterState
+                                  | QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing)
+        self.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        self.scale(1, -1)
+
+    def setScene(self, scene):
+        if scene is not None:
+            scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+        super().setScene(scene)
+
+    def wheelEvent(self, event):
+        factor = self.ZOOM_STEP ** (event.angleDelta().y() / 120)
+        self.scale(factor, factor)
+
+    def fit(self):
+        rect = self.scene().itemsBoundingRect() if self.scene() else QRectF()
+        if not rect.isEmpty():
+            self.fitInView(rect, Qt.AspectRatioMode.KeepAspectRatio)
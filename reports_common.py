@@ -0,0 +1,27 @@
+# reports/common.py
+
+from datetime import datetime
+
+
+def metadata(seed=None):
+    """
+    (label, value) rows every report opens with: when it was generated
+    and, if known, the seed of the nesting run, so its layouts can be
+    reproduced.
+    """
+    rows = [('Generated', datetime.now().isoformat())]
+    if seed is not None:
+        rows.append(('Seed', seed))
+    return rows
+
+
+def write_csv_header(writer, title, seed=None):
+    writer.writerow([title])
+    for label, value in metadata(seed):
+        writer.writerow([label, value])
+
+
+def write_text_header(f, title, seed=None):
+    f.write(f"{title}\n")
+    for label, value in metadata(seed):
+        f.write(f"{label}: {value}\n")
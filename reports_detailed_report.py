@@ -1,22 +1,24 @@
 # reports/detailed_report.py
 
 import csv
-from datetime import datetime
+
+from reports.common import write_csv_header, write_text_header
 
 class DetailedReport:
     """
     Generates detailed nesting reports with per-sheet and per-part info.
     """
-    def __init__(self, results, sheets, parts, output_path):
+    def __init__(self, results, sheets, parts, output_path, seed=None):
         self.results = results
         self.sheets = sheets
         self.parts = parts
         self.output_path = output_path
+        self.seed = seed
 
     def generate_csv(self):
         with open(self.output_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow(['Detailed Report', datetime.now().isoformat()])
+            write_csv_header(writer, 'Detailed Report', self.seed)
             for i, sol in enumerate(self.results, start=1):
                 writer.writerow([])
                 writer.writerow([f'Solution {i}', f"Efficiency: {sol['efficiency']:.2f}"])
@@ -35,7 +37,7 @@ class DetailedReport:
 
     def generate_text(self):
         with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.write(f"Detailed Report\nGenerated: {datetime.now().isoformat()}\n")
+            write_text_header(f, 'Detailed Report', self.seed)
             for i, sol in enumerate(self.results, start=1):
                 f.write(f"\nSolution {i}: Efficiency = {sol['efficiency']:.2f}\n")
                 for sheet in self.sheets:
@@ -1,21 +1,23 @@
 # reports/summary_report.py
 
 import csv
-from datetime import datetime
+
+from reports.common import write_csv_header, write_text_header
 
 class SummaryReport:
     """
     Generates summary reports for nesting results in CSV or plain-text format.
     """
-    def __init__(self, results, sheets, output_path):
+    def __init__(self, results, sheets, output_path, seed=None):
         self.results = results
         self.sheets = sheets
         self.output_path = output_path
+        self.seed = seed
 
     def generate_csv(self):
         with open(self.output_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow(['Report','Generated', datetime.now().isoformat()])
+            write_csv_header(writer, 'Summary Report', self.seed)
             writer.writerow(['Total Solutions', len(self.results)])
             writer.writerow(['Sheets Used', len(self.sheets)])
             writer.writerow([])
@@ -25,7 +27,7 @@ class SummaryReport:
 
     def generate_text(self):
         with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.write(f"Summary Report\nGenerated: {datetime.now().isoformat()}\n")
+            write_text_header(f, 'Summary Report', self.seed)
             f.write(f"Total Solutions: {len(self.results)}\n")
             f.write(f"Sheets Used: {len(self.sheets)}\n\n")
             for i, sol in enumerate(self.results, start=1):
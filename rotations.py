@@ -0,0 +1,93 @@
+# core/rotations.py
+
+import math
+
+import numpy as np
+import shapely
+
+from core.geometry_levels import part_geometry
+
+
+def _rotation(angle):
+    # Exact zeros at quarter turns, as shapely.affinity.rotate does
+    theta = math.radians(angle)
+    c, s = math.cos(theta), math.sin(theta)
+    c = 0.0 if abs(c) < 2.5e-16 else c
+    s = 0.0 if abs(s) < 2.5e-16 else s
+    return np.array([[c, s], [-s, c]])
+
+
+class RotationTable:
+    """
+    Every part rotated by every angle, computed once up front.
+
+    Rotation is about the origin, as in the GA frame; each rotated copy is
+    then shifted so its bounding box starts at (0, 0). Per (angle, part)
+    the table holds:
+
+    - `bounds[a, i]`: bounds of the part rotated about the origin (the
+      shift that normalizes it is `-bounds[a, i, :2]`);
+    - `sizes[a, i]`: rotated bounding-box width and height;
+    - `geoms[a, i]`: the normalized geometry, prepared by GEOS;
+
+    and `areas[i]`, which rotation does not change. Angles are arbitrary
+    degrees, not just quarter turns. Placing a part is then a lookup plus a
+    shift of its coordinate array; no shapely rotation runs after setup.
+    Parts sharing one geometry object (copies of a part, see
+    core.duplicates) are rotated once and share their table entries.
+    """
+    def __init__(self, parts, rotation_angles):
+        self.angles = [float(a) for a in rotation_angles]
+        self.angle_index = {a: k for k, a in enumerate(self.angles)}
+        geometries = [part_geometry(p) for p in parts]
+        n_angles, n_parts = len(self.angles), len(geometries)
+        self.areas = np.array([g.area for g in geometries], dtype=float)
+        self.bounds = np.zeros((n_angles, n_parts, 4))
+        self.geoms = np.empty((n_angles, n_parts), dtype=object)
+        if not n_angles:
+            self.sizes = np.zeros((0, n_parts, 2))
+            return
+        matrices = np.stack([_rotation(a) for a in self.angles])
+        first = {}
+        for i, geom in enumerate(geometries):
+            # Copies of a part share one geometry; rotate it only once
+            j = first.setdefault(id(geom), i)
+            if j != i:
+                self.bounds[:, i], self.geoms[:, i] = self.bounds[:, j], self.geoms[:, j]
+                continue
+            coords = shapely.get_coordinates(geom)
+            if not len(coords):
+                self.geoms[:, i] = geom
+                continue
+            # (angles, vertices, 2): every rotation of the part in one product
+            rotated = coords @ matrices
+            lo, hi = rotated.min(axis=1), rotated.max(axis=1)
+            self.bounds[:, i, :2], self.bounds[:, i, 2:] = lo, hi
+            flat = (rotated - lo[:, None, :]).reshape(-1, 2)
+            self.geoms[:, i] = shapely.transform(np.full(n_angles, geom, dtype=object), lambda _: flat)
+        shapely.prepare(self.geoms)
+        self.sizes = self.bounds[..., 2:] - self.bounds[..., :2]
+
+    def index(self, angle):
+        """Row of `angle` in the table (KeyError if it was not precomputed)."""
+        return self.angle_index[float(angle)]
+
+    def geometry(self, i, angle):
+        """Part i at `angle`, bounding box at the origin (prepared)."""
+        return self.geoms[self.index(angle), i]
+
+    def place(self, i, angle, pos):
+        """Part i at `angle` with its bounding box starting at `pos`."""
+        return self.place_many([i], [self.index(angle)], [pos])[0]
+
+    def place_many(self, parts, rot, pos):
+        """
+        Place a batch in one vectorized call: parts and rot are (N,) part and
+        angle-row indices, pos is (N, 2). Returns an (N,) geometry array.
+        """
+        geoms = self.geoms[np.asarray(rot, dtype=np.intp), np.asarray(parts, dtype=np.intp)]
+        if not len(geoms):
+            return geoms
+        counts = shapely.get_num_coordinates(geoms)
+        offsets = np.repeat(np.asarray(pos, dtype=float).reshape(-1, 2), counts, axis=0)
+        return shapely.transform(geoms, lambda coords: coords + offsets)
@@ -0,0 +1,60 @@
+# tests/test_batch.py
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from ezdxf import new
+
+from batch import run_job
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_job(path, **extra):
+    job = {
+        'parts': [{'name': 'P1', 'width': 20, 'height': 10, 'quantity': 3},
+                  {'file': 'square.dxf', 'quantity': 2}],
+        'sheets': [{'name': 'S1', 'width': 60, 'height': 60, 'quantity': 2}],
+        'settings': {'genetic_algorithm': {'population_size': 6, 'generations': 2},
+                     'file_paths': {'import_cache': str(path.parent / 'cache')}},
+    }
+    job.update(extra)
+    path.write_text(json.dumps(job))
+    return path
+
+
+@pytest.fixture
+def job_dir(tmp_path):
+    doc = new()
+    doc.modelspace().add_lwpolyline([(0, 0), (15, 0), (15, 15), (0, 15)], close=True)
+    doc.saveas(str(tmp_path / 'square.dxf'))
+    return tmp_path
+
+
+def test_batch_job_writes_layout_and_report(job_dir):
+    summary = run_job(str(write_job(job_dir / 'job.json')), str(job_dir / 'out'))
+    with open(os.path.join(summary['output'], 'layout.json')) as f:
+        layout = json.load(f)
+    names = [p['name'] for s in layout['sheets'] for p in s['placements']] + layout['unplaced']
+    assert sorted(names) == ['P1'] * 3 + ['square'] * 2
+    assert os.path.exists(os.path.join(summary['output'], 'summary.csv'))
+
+
+def test_batch_directory_runs_without_pyqt(job_dir):
+    write_job(job_dir / 'a.json')
+    write_job(job_dir / 'b.json')
+    code = ('import sys, batch; status = batch.main([sys.argv[1], "-o", sys.argv[2], "-w", "2", "--trace", "--profile"]); '
+            'assert not [m for m in sys.modules if m.startswith("PyQt")]; sys.exit(status)')
+    proc = subprocess.run([sys.executable, '-c', code, str(job_dir), str(job_dir / 'out')],
+                          cwd=ROOT, capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stderr
+    assert 'Startup:' in proc.stdout
+    assert os.path.exists(job_dir / 'out' / 'a' / 'layout.json')
+    assert os.path.exists(job_dir / 'out' / 'b' / 'layout.json')
+    assert os.path.exists(job_dir / 'out' / 'a' / 'profile.prof')
+    with open(job_dir / 'out' / 'a' / 'trace.json') as f:
+        names = {e['name'] for e in json.load(f)['traceEvents']}
+    assert {'nest', 'ga.fitness', 'import.read'} <= names
@@ -0,0 +1,23 @@
+# tests/test_benchmarks.py
+
+import json
+
+from benchmarks import bench_nesting
+
+
+def test_benchmark_records_and_compares(tmp_path):
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 2, 'rotation_angles': [0]}}
+    report = bench_nesting.run(['jakobs-like'], settings, repeat=1)
+    record = report['results'][0]
+    assert record['instance'] == 'jakobs-like' and record['parts'] == 25
+    assert record['generations'] == 2 * record['sheets_used']
+    assert record['evaluations_per_s'] > 0 and record['peak_memory_mb'] > 0
+    assert 0 < record['utilization'] <= 1
+
+    path = tmp_path / 'bench.json'
+    path.write_text(json.dumps(report))
+    baseline = json.loads(path.read_text())
+    assert bench_nesting.compare(baseline, report) == []
+    slower = json.loads(json.dumps(report))
+    slower['results'][0]['wall_time'] *= 2
+    assert bench_nesting.compare(baseline, slower)[0].startswith('jakobs-like: wall time')
@@ -0,0 +1,32 @@
+# tests/test_collision.py
+
+import numpy as np
+from shapely.geometry import Polygon
+from core.collision import box_pairs, validate_layout
+from core.nesting_engine import NestingEngine
+
+
+def test_collision_broad_phase_and_layout_validator():
+    rng = np.random.default_rng(1)
+    lo = rng.uniform(0, 100, (3, 30, 2))
+    hi = lo + rng.uniform(1, 20, (3, 30, 2))
+    row, i, j = box_pairs(lo, hi)
+    found = {(r, min(a, b), max(a, b)) for r, a, b in zip(row, i, j)}
+    brute = {(r, a, b) for r in range(3) for a in range(30) for b in range(a + 1, 30)
+             if (lo[r, a] < hi[r, b]).all() and (lo[r, b] < hi[r, a]).all()}
+    assert found == brute
+
+    l_shape = {'geometry': Polygon([(0, 0), (30, 0), (30, 10), (10, 10), (10, 30), (0, 30)])}
+    square = {'width': 10, 'height': 10}
+    genes = [{'part': l_shape, 'angle': 0, 'pos': (0, 0)},
+             {'part': square, 'angle': 0, 'pos': (15, 15)},   # in the L's notch: fine
+             {'part': square, 'angle': 0, 'pos': (2, 2)},     # overlaps the L
+             {'part': square, 'angle': 90, 'pos': (45, 0)}]   # off a 50 wide sheet
+    report = validate_layout(genes, {'width': 50, 'height': 50}, spacing=2.0)
+    assert report == {'collisions': [(0, 2)], 'outside': [3]}
+
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 2, 'rotation_angles': [0, 90]},
+                'spacing': {'part_to_part': 2.0, 'margin': 1.0}}
+    parts = [l_shape, square, square, {'width': 15, 'height': 8}]
+    result = NestingEngine(settings).nest(parts, [{'width': 60, 'height': 60}])
+    assert result['valid']
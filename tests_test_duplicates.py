@@ -0,0 +1,36 @@
+# tests/test_duplicates.py
+
+import numpy as np
+from shapely.affinity import rotate, scale, translate
+from shapely.geometry import Polygon
+from core.duplicates import fingerprint, merge_duplicates, neighbour_keys, same_shape
+
+
+def test_duplicate_parts_merge_into_quantities():
+    bracket = Polygon([(0, 0), (50, 0), (50, 10), (10, 10), (10, 30), (0, 30)],
+                      [[(2, 2), (6, 2), (6, 6), (2, 6)]])
+    turned = translate(rotate(bracket, 37, origin=(0, 0)), 500, -80)
+    mirrored = scale(bracket, -1, 1)
+    other = Polygon([(0, 0), (50, 0), (50, 12), (10, 12), (10, 30), (0, 30)])
+    assert fingerprint(turned) in neighbour_keys(fingerprint(bracket))
+    assert same_shape(bracket, turned) is not None
+    assert same_shape(bracket, mirrored) is None
+
+    parts = [{'geometry': g, 'name': f'P{k}'} for k, g in enumerate([bracket, turned, mirrored, other, bracket])]
+    parts[1]['quantity'] = 3
+    merged = merge_duplicates(parts)
+    assert [p['name'] for p in merged] == ['P0', 'P2', 'P3']
+    assert [p['quantity'] for p in merged] == [5, 1, 1]
+    assert 'quantity' not in parts[0]
+
+
+def test_translated_copies_merge_across_fingerprint_bins():
+    rng = np.random.default_rng(11)
+    # Dimensions on a grid half the tolerance wide sit on bin edges, where
+    # a plain translation's float noise flips a rounded key
+    for _ in range(200):
+        w, h = rng.integers(2000, 20000, 2) / 200
+        t = min(w, h) / 3
+        bracket = Polygon([(0, 0), (w, 0), (w, t), (t, t), (t, h), (0, h)])
+        moved = translate(bracket, *rng.uniform(-1e4, 1e4, 2))
+        assert len(merge_duplicates([{'geometry': bracket}, {'geometry': moved}])) == 1
@@ -0,0 +1,32 @@
+# tests/test_fitness.py
+
+import numpy as np
+from core.fitness import FitnessEvaluator
+
+
+def test_fitness_penalizes_overlap_and_overflow():
+    parts = [{'width': 10, 'height': 10}, {'width': 10, 'height': 10}]
+    ev = FitnessEvaluator(parts, {'width': 100, 'height': 100}, [0, 90])
+    rot = [[0, 0], [0, 0], [0, 1]]
+    pos = [[(0, 0), (10, 0)], [(0, 0), (5, 0)], [(0, 0), (95, 0)]]
+    packed, overlapping, overflowing = ev.evaluate(rot, pos)
+    assert packed > overlapping
+    assert packed > overflowing
+
+
+def test_incremental_fitness_matches_full_evaluation():
+    rng = np.random.default_rng(0)
+    parts = [{'width': w, 'height': h} for w, h in rng.uniform(5, 40, (40, 2))]
+    ev = FitnessEvaluator(parts, {'width': 150, 'height': 150}, [0, 90])
+    rot = rng.integers(0, 2, (8, 40))
+    pos = rng.uniform(0, 150, (8, 40, 2))
+    _, contrib = ev.score(rot, pos)
+
+    mutated_rot, mutated_pos = rot.copy(), pos.copy()
+    hit = rng.random((8, 40)) < 0.1
+    mutated_rot[hit] = 1 - mutated_rot[hit]
+    mutated_pos[hit] += 3.0
+    full, full_contrib = ev.score(mutated_rot, mutated_pos)
+    delta, delta_contrib = ev.score(mutated_rot, mutated_pos, base=(rot, pos, contrib))
+    assert np.allclose(full, delta)
+    assert np.allclose(full_contrib, delta_contrib)
@@ -0,0 +1,39 @@
+# tests/test_genome.py
+
+import numpy as np
+from core.genetic_algorithm import GeneticAlgorithm
+from core.genome import canonical_instances, genome_hash
+from core.placement import BottomLeftDecoder
+
+
+def test_instance_groups_keep_genomes_canonical():
+    a, b = {'width': 20, 'height': 10}, {'width': 15, 'height': 15}
+    parts = [a] * 4 + [b] * 3
+    ga = GeneticAlgorithm(12, 4, [0, 90], seed=5)
+    ga.initialize_population(parts, [{'width': 60, 'height': 60}])
+    assert ga.kinds.tolist() == [0, 0, 0, 0, 1, 1, 1]
+    ga.step()
+    ga.step()
+    again = canonical_instances(ga.population.copy(), ga.kinds)
+    np.testing.assert_array_equal(again, ga.population)
+    # Copies of a part are placed in index order
+    for order in ga.population['order']:
+        for kind in (0, 1):
+            copies = [i for i in order if ga.kinds[i] == kind]
+            assert copies == sorted(copies)
+
+    # Renumbering copies (labels, rotations and positions together) keeps the layout and the canonical genome
+    genome = ga.population[:1].copy()
+    renamed = genome.copy()
+    i, j = 0, 3
+    order = renamed['order'][0]
+    order[genome['order'][0] == i], order[genome['order'][0] == j] = j, i
+    for field in ('rot', 'x', 'y'):
+        renamed[field][0, [i, j]] = genome[field][0, [j, i]]
+    assert genome_hash(renamed[0]) != genome_hash(genome[0])
+    decoder = BottomLeftDecoder(ga.evaluator.sizes, ga.sheet)
+    pos = decoder.decode(genome['order'][0], genome['rot'][0])[0]
+    moved = decoder.decode(renamed['order'][0], renamed['rot'][0])[0]
+    assert sorted(map(tuple, pos.tolist())) == sorted(map(tuple, moved.tolist()))
+    canonical_instances(renamed, ga.kinds)
+    assert genome_hash(renamed[0]) == genome_hash(genome[0])
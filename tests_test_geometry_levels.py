@@ -0,0 +1,27 @@
+# tests/test_geometry_levels.py
+
+from shapely.geometry import Point, Polygon, box
+from core.collision import validate_layout
+from core.geometry_levels import PartLevels
+
+
+def test_part_levels_are_conservative_and_coarse():
+    disc = Point(0, 0).buffer(50, quad_segs=512).difference(Point(0, 0).buffer(20))
+    levels = PartLevels(disc, spacing=4.0, tolerance=0.5)
+    assert len(levels.outline.exterior.coords) < len(disc.exterior.coords) / 4
+    assert levels.outline.contains(Polygon(disc.exterior).buffer(2.0))
+    assert levels.outline.bounds[0] < -52
+
+    # The validator screens pairs on these outlines, then checks full geometry
+    small = box(0, 0, 10, 10)
+    sheet = {'width': 500, 'height': 500}
+
+    def collide(a, pos_a, b, pos_b):
+        genes = [{'part': a, 'angle': 0, 'pos': pos_a}, {'part': b, 'angle': 0, 'pos': pos_b}]
+        return bool(validate_layout(genes, sheet, spacing=4.0, tolerance=0.5)['collisions'])
+
+    assert not collide(disc, (100, 100), small, (350, 150))     # bboxes apart
+    assert not collide(disc, (100, 100), small, (145, 145))     # inside the hole
+    assert collide(disc, (100, 100), small, (199, 145))         # on the rim
+    assert collide(small, (0, 0), small, (13, 0))               # 3 apart < spacing
+    assert not collide(small, (0, 0), small, (15, 0))           # 5 apart
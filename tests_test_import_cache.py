@@ -0,0 +1,34 @@
+# tests/test_import_cache.py
+
+from ezdxf import new
+from core.cad_importer import import_files, import_settings
+from core.import_cache import ImportCache
+
+
+def test_import_cache_round_trip(tmp_path):
+    doc = new()
+    msp = doc.modelspace()
+    msp.add_lwpolyline([(0, 0), (40, 0), (40, 30), (0, 30)], close=True)
+    msp.add_lwpolyline([(50, 0), (60, 0), (60, 10)], close=True, dxfattribs={'layer': 'CUT'})
+    path = tmp_path / "library.dxf"
+    doc.saveas(str(path))
+    cache_dir = str(tmp_path / "cache")
+
+    fresh = next(import_files([str(path)], cache_dir=cache_dir))[1]
+    cached = next(import_files([str(path)], cache_dir=cache_dir))[1]
+    assert [p['name'] for p in cached] == [p['name'] for p in fresh]
+    assert [p['layer'] for p in cached] == ['0', 'CUT']
+    assert all(c['geometry'].equals(f['geometry']) for c, f in zip(cached, fresh))
+    assert cached[0]['width'] == 40 and cached[1]['area'] == 50
+
+    cache = ImportCache(cache_dir)
+    assert cache.get(cache.key(str(path), {'scale': 2}), str(path)) is None
+    scaled = next(import_files([str(path)], settings={'scale': 2}, cache_dir=cache_dir))[1]
+    assert scaled[0]['width'] == 80
+
+    # A copy hits the same entry but takes its own name
+    copy = tmp_path / "flange.dxf"
+    copy.write_bytes(path.read_bytes())
+    renamed = next(import_files([str(copy)], cache_dir=cache_dir))[1]
+    assert cache.get(cache.key(str(copy), import_settings(None)), str(copy)) is not None
+    assert [p['name'] for p in renamed] == ['flange_1', 'flange_2']
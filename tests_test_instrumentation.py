@@ -0,0 +1,34 @@
+# tests/test_instrumentation.py
+
+import json
+import time
+from core import instrumentation
+from core.nesting_engine import NestingEngine
+
+
+def test_instrumentation_records_ga_stages_and_workers():
+    settings = {'genetic_algorithm': {'population_size': 8, 'generations': 3,
+                                      'rotation_angles': [0, 90], 'workers': 2}}
+    parts = [{'width': 30, 'height': 30} for _ in range(6)]
+    sheets = [{'name': 'S', 'width': 50, 'height': 50, 'quantity': 6}]
+    assert instrumentation.active() is None
+    with instrumentation.recording() as recorder:
+        NestingEngine(settings).nest(parts, sheets)
+    assert instrumentation.active() is None
+    summary = recorder.summary()
+    for name in ('nest', 'nest.assign', 'nest.layout', 'ga.select', 'ga.crossover', 'ga.mutate', 'ga.fitness'):
+        assert summary['spans'][name]['count'] >= 1, name
+    # sheets were solved in worker processes and their spans merged back
+    assert len({pid for *_, pid, _, _ in recorder.spans}) > 1
+    assert summary['counters']['ga.evaluations'] > 0
+    trace = json.loads(json.dumps(recorder.chrome_trace()))
+    assert all(e['ph'] in ('X', 'C') and e['ts'] >= 0 for e in trace['traceEvents'])
+
+    # Disabled hooks are a global lookup and nothing else
+    @instrumentation.timed('noop')
+    def noop():
+        return None
+    started = time.perf_counter()
+    for _ in range(10000):
+        noop()
+    assert time.perf_counter() - started < 0.1
@@ -0,0 +1,38 @@
+# tests/test_islands.py
+
+import numpy as np
+from shapely.geometry import box
+from core.collision import validate_layout
+from core.genome import GENE_DTYPE
+from core.islands import IslandModel
+from core.nesting_engine import ISLAND_STRATEGY, NestingEngine
+
+
+def test_island_model_ring_migration():
+    model = IslandModel(8, 4, [0, 90], islands=2, migration_interval=2, migrants=1)
+    states = [{'population': np.zeros((4, 2), dtype=GENE_DTYPE), 'scores': np.arange(4.0) + 10 * k}
+              for k in range(2)]
+    model.migrate(states)
+    # island 0's best (score 3) replaces island 1's worst and vice versa
+    assert states[1]['scores'].min() == 3.0
+    assert states[0]['scores'].max() == 13.0
+
+    parts = [{'width': 10, 'height': 20}, {'width': 5, 'height': 5}]
+    best = model.run(parts, [{'width': 50, 'height': 50}], seed=3)
+    assert sorted(best['order']) == [0, 1]
+
+
+def test_island_layouts_keep_every_assigned_part_on_the_sheet():
+    rng = np.random.default_rng(5)
+    parts = [{'geometry': box(0, 0, *rng.uniform(5, 30, 2)), 'name': f'P{k}'} for k in range(60)]
+    settings = {'genetic_algorithm': {'population_size': 8, 'generations': 4, 'rotation_angles': [0, 90], 'seed': 1,
+                                      'islands': {'count': 2, 'migration_interval': 2}},
+                'spacing': {'part_to_part': 1.0, 'margin': 1.0}}
+    sheets = [{'width': 150.0, 'height': 150.0, 'quantity': 1}]
+    # Batch and anytime runs both start from the greedy packing
+    for callback in (None, lambda layout, fraction: None):
+        result = NestingEngine(settings, ISLAND_STRATEGY).nest(parts, sheets, callback)
+        for layout in result['sheets']:
+            violations = validate_layout(layout['genes'], layout['sheet'], 1.0, 1.0)
+            assert not violations['outside'] and not violations['collisions']
+        assert result['valid']
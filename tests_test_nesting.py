@@ -1,7 +1,15 @@
 # tests/test_nesting.py
 
+import numpy as np
 import pytest
+from shapely.geometry import box
+from core import instrumentation
 from core.genetic_algorithm import GeneticAlgorithm
+from core.inventory import assign_parts
+from core.nesting_engine import CancelToken, NestingEngine
+from core.nfp import NFPEngine
+from core.rotations import RotationTable
+from reports.summary_report import SummaryReport
 
 
 def test_ga_basic():
@@ -9,5 +17,177 @@ def test_ga_basic():
     sheets = [{'width': 100, 'height': 100}]
     ga = GeneticAlgorithm(10, 5, [0, 90])
     best = ga.run(parts, sheets)
-    assert isinstance(best, list)
-    assert all('part' in gene for gene in best)
+    genes = ga.to_genes(best)
+    assert isinstance(genes, list)
+    assert all('part' in gene for gene in genes)
+
+
+def test_ga_runs_with_a_single_individual():
+    parts = [{'width': 10, 'height': 20}, {'width': 30, 'height': 5}]
+    ga = GeneticAlgorithm(1, 3, [0, 90], seed=2)
+    best = ga.run(parts, [{'width': 100, 'height': 100}])
+    assert len(ga.to_genes(best)) == 2
+
+
+def test_parallel_fitness_matches_serial():
+    parts = [{'width': w, 'height': h} for w, h in [(10, 20), (30, 5), (15, 15), (8, 40)]]
+    sheets = [{'width': 100, 'height': 100}]
+    results = []
+    for workers in (1, 2):
+        ga = GeneticAlgorithm(12, 3, [0, 90], workers=workers, seed=7)
+        best = ga.run(parts, sheets)
+        results.append(best.tobytes())
+    assert results[0] == results[1]
+
+
+def test_offspring_do_not_alias_parents():
+    parts = [{'width': 10, 'height': 10} for _ in range(6)]
+    ga = GeneticAlgorithm(8, 0, [0, 90])
+    ga.rng = np.random.default_rng(1)
+    ga.initialize_population(parts, [{'width': 100, 'height': 100}])
+    parents = ga.select()
+    snapshot = parents.copy()
+    offspring = ga.crossover(parents)
+    ga.mutation_rate = 1.0
+    ga.mutate(offspring)
+    assert np.array_equal(parents, snapshot)
+    assert all(sorted(row) == list(range(6)) for row in offspring['order'])
+
+
+def test_fitness_cache_reuses_scores_of_repeated_genomes():
+    parts = [{'width': w, 'height': h} for w, h in [(10, 20), (30, 5), (15, 15)]]
+    ga = GeneticAlgorithm(6, 0, [0, 90])
+    ga.initialize_population(parts, [{'width': 100, 'height': 100}])
+    population = np.concatenate([ga.population[:2], ga.population[:2]])
+    scores = ga.evaluate(population.copy())
+    assert ga.cache.hits == 2
+    again = ga.evaluate(population.copy())
+    assert ga.cache.hits == 6
+    np.testing.assert_array_equal(scores, again)
+    uncached = GeneticAlgorithm(6, 0, [0, 90], cache_size=0)
+    uncached.initialize_population(parts, [{'width': 100, 'height': 100}])
+    np.testing.assert_allclose(uncached.evaluate(population.copy()), scores)
+
+
+def test_incremental_fitness_fires_in_both_placements():
+    rng = np.random.default_rng(2)
+    parts = [{'width': w, 'height': h} for w, h in rng.uniform(5, 30, (30, 2))]
+    sheets = [{'width': 150, 'height': 150}]
+    counters = {}
+    for placement in ('free', 'bottom_left'):
+        ga = GeneticAlgorithm(20, 10, [0, 90], placement=placement, cache_size=0, seed=4)
+        with instrumentation.recording() as recorder:
+            ga.run(parts, sheets)
+        counters[placement] = recorder.summary()['counters']
+    free = counters['free']
+    # Many offspring differ from their first parent in only a few genes
+    assert free['fitness.incremental_rows'] > free['ga.evaluations'] // 3
+    # Decoded offspring copy the layout prefix they share with that parent
+    assert counters['bottom_left']['placement.reused'] > 0
+    assert 'placement.reused' not in free
+
+
+def test_parts_spill_over_sheet_inventory():
+    parts = [{'name': f'P{i}', 'width': 40, 'height': 40} for i in range(7)]
+    sheets = [{'name': 'Small', 'width': 50, 'height': 50, 'quantity': 10},
+              {'name': 'Large', 'width': 100, 'height': 100, 'quantity': 1}]
+    assignments, unplaced = assign_parts(parts, sheets, [0])
+    # the large sheet holds four parts at the same cost per area as a small
+    # one, the rest spill onto small sheets one by one
+    assert [a['sheet']['name'] for a in assignments] == ['Small'] * 7
+    assert len(unplaced) == 0
+
+    sheets[0]['quantity'] = 2
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 2, 'rotation_angles': [0, 90]},
+                'spacing': {'part_to_part': 0.0, 'margin': 0.0}}
+    result = NestingEngine(settings).nest(parts, sheets)
+    assert sorted(l['sheet']['name'] for l in result['sheets']) == ['Large', 'Small', 'Small']
+    assert sum(len(l['genes']) for l in result['sheets']) == 6
+    assert len(result['unplaced']) == 1
+
+
+def test_anytime_nesting_reports_progress_and_cancels():
+    parts = [{'width': 10 + i, 'height': 5 + i} for i in range(6)]
+    sheets = [{'width': 30, 'height': 30, 'quantity': 4}]
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 4, 'rotation_angles': [0, 90],
+                                      'report_every': 2},
+                'spacing': {'part_to_part': 0.0, 'margin': 0.0}}
+    reports = []
+    result = NestingEngine(settings).nest(parts, sheets, lambda r, f: reports.append((r, f)))
+    assert len(reports) == 2 * len(result['sheets'])
+    assert all(len(r['sheets']) == len(result['sheets']) for r, _ in reports)
+    # every report carries the fitness cache counters so far
+    assert all(r['stats']['fitness_cache']['misses'] > 0 for r, _ in reports)
+    assert reports[-1][1] == 1.0
+
+    cancel = CancelToken()
+    cancel.cancel()
+    stopped = NestingEngine(settings).nest(parts, sheets, cancel=cancel)
+    # the greedy packing stands in for sheets that never evolved
+    assert sum(len(l['genes']) for l in stopped['sheets']) == len(parts) - len(stopped['unplaced'])
+
+
+def test_anytime_nesting_solves_sheets_in_parallel():
+    parts = [{'width': 20, 'height': 15 + i} for i in range(4)]
+    sheets = [{'width': 30, 'height': 30, 'quantity': 4}]
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 4, 'rotation_angles': [0, 90],
+                                      'workers': 2, 'seed': 5},
+                'spacing': {'part_to_part': 0.0, 'margin': 0.0}}
+    reports = []
+    result = NestingEngine(settings).nest(parts, sheets, lambda r, f: reports.append(f), CancelToken())
+    # one report per finished sheet
+    n = len(result['sheets'])
+    assert n > 1 and reports == [k / n for k in range(1, n + 1)]
+    assert result['valid']
+
+    cancel = CancelToken()
+    cancel.cancel()
+    stopped = NestingEngine(settings).nest(parts, sheets, cancel=cancel)
+    assert sum(len(l['genes']) for l in stopped['sheets']) == len(parts) - len(stopped['unplaced'])
+
+
+def test_seed_reproduces_runs_bit_for_bit(tmp_path):
+    parts = [{'name': f'P{i}', 'width': 5 + 3 * i, 'height': 40 - 2 * i} for i in range(12)]
+    sheets = [{'name': 'S', 'width': 60, 'height': 60, 'quantity': 4}]
+
+    def run(seed, workers=1):
+        settings = {'genetic_algorithm': {'population_size': 10, 'generations': 4,
+                                          'rotation_angles': [0, 90], 'workers': workers, 'seed': seed}}
+        result = NestingEngine(settings).nest(parts, sheets)
+        return result, [(g['part']['name'], g['angle'], tuple(g['pos'])) for l in result['sheets'] for g in l['genes']]
+
+    first, layout = run(1234)
+    assert first['seed'] == 1234
+    assert run(1234)[1] == layout
+    # sheets get their own streams, so spreading them over workers changes nothing
+    assert run(1234, workers=2)[1] == layout
+    fresh, _ = run(None)
+    assert fresh['seed'] != run(None)[0]['seed']
+
+    path = tmp_path / 'summary.csv'
+    SummaryReport(first['sheets'], sheets, str(path), first['seed']).generate_csv()
+    assert 'Seed,1234' in path.read_text()
+
+
+def test_part_quantities_share_precomputed_geometry():
+    part = {'geometry': box(0, 0, 20, 10), 'name': 'P', 'quantity': 6}
+    table = RotationTable([part] * 6, [0, 90])
+    assert table.geoms[1, 0] is table.geoms[1, 5]
+    assert len(set(NFPEngine([part] * 6, [0, 90]).keys)) == 1
+
+    settings = {'genetic_algorithm': {'population_size': 8, 'generations': 3,
+                                      'rotation_angles': [0, 90], 'seed': 3}}
+    result = NestingEngine(settings).nest([part], [{'width': 100, 'height': 100, 'quantity': 1}])
+    genes = result['sheets'][0]['genes']
+    assert len(genes) == 6 and all(gene['part'] is part for gene in genes)
+    assert result['valid']
+
+
+def test_touching_parts_stay_valid_at_large_coordinates():
+    # Zero spacing: decoded parts touch exactly, at coordinates in the thousands
+    rng = np.random.default_rng(3)
+    parts = [{'geometry': box(0, 0, *rng.uniform(400, 1800, 2)), 'name': f'P{k}'} for k in range(16)]
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 2, 'rotation_angles': [0, 90], 'seed': 1},
+                'spacing': {'part_to_part': 0.0, 'margin': 0.0}}
+    result = NestingEngine(settings).nest(parts, [{'width': 4900.0, 'height': 9000.0, 'quantity': 1}])
+    assert result['valid'], [layout['violations'] for layout in result['sheets']]
@@ -0,0 +1,66 @@
+# tests/test_nfp.py
+
+import numpy as np
+import pytest
+from shapely.geometry import box, Polygon
+from core.collision import validate_layout
+from core.nesting_engine import NestingEngine
+from core.nfp import NFPCache, NFPEngine, minkowski_nfp, inner_fit_polygon
+
+
+def test_square_nfp_and_ifp():
+    nfp = minkowski_nfp(box(0, 0, 1, 1), box(0, 0, 1, 1))
+    assert nfp.bounds == (-1.0, -1.0, 1.0, 1.0)
+    assert nfp.area == pytest.approx(4.0)
+    assert inner_fit_polygon(box(0, 0, 2, 1), 10, 5).bounds == (0.0, 0.0, 8.0, 4.0)
+    assert inner_fit_polygon(box(0, 0, 20, 1), 10, 5) is None
+
+
+def test_cache_persists_to_disk(tmp_path):
+    parts = [{'geometry': Polygon([(0, 0), (3, 0), (3, 1), (1, 1), (1, 3), (0, 3)])},
+             {'width': 2, 'height': 1}]
+    first = NFPEngine(parts, [0, 90], NFPCache(cache_dir=str(tmp_path)))
+    first.precompute()
+    assert first.cache.misses > 0
+
+    second = NFPEngine(parts, [0, 90], NFPCache(cache_dir=str(tmp_path)))
+    second.precompute()
+    assert second.cache.misses == 0
+    assert second.nfp(0, 90, 1, 0).equals(first.nfp(0, 90, 1, 0))
+
+
+def test_nfp_keeps_spacing():
+    parts = [{'width': 10, 'height': 10}, {'width': 4, 'height': 6}]
+    engine = NFPEngine(parts, [0], spacing=2.0, tolerance=0.1)
+    nfp = engine.nfp(0, 0, 1, 0)
+    minx, miny, maxx, maxy = nfp.bounds
+    # touching the NFP boundary leaves at least the spacing between parts
+    assert maxx >= 12 and minx <= -6
+
+
+def test_validator_screens_pairs_with_cached_nfps():
+    rng = np.random.default_rng(4)
+    ell = Polygon([(0, 0), (30, 0), (30, 8), (8, 8), (8, 25), (0, 25)])
+    kinds = [ell, box(0, 0, 12, 7), Polygon([(0, 0), (20, 0), (10, 15)])]
+    sheet = {'width': 150, 'height': 150}
+    cache = NFPCache()
+    for spacing in (0.0, 2.0):
+        genes = [{'part': kinds[k], 'angle': float(a), 'pos': tuple(p)}
+                 for k, a, p in zip(rng.integers(0, 3, 40), rng.choice([0, 90, 37.5], 40),
+                                    rng.uniform(0, 120, (40, 2)))]
+        plain = validate_layout(genes, sheet, spacing)
+        screened = validate_layout(genes, sheet, spacing, nfp_cache=cache)
+        assert plain['collisions'] and sorted(screened['collisions']) == sorted(plain['collisions'])
+    assert cache.misses > 0 and cache.hits > 0
+
+
+def test_engine_keeps_nfps_in_the_configured_directory(tmp_path):
+    parts = [{'geometry': Polygon([(0, 0), (30, 0), (30, 8), (8, 8), (8, 25), (0, 25)]), 'quantity': 4}]
+    settings = {'genetic_algorithm': {'population_size': 6, 'generations': 2, 'rotation_angles': [0, 90], 'seed': 1},
+                'file_paths': {'nfp_cache': str(tmp_path / 'nfp')}}
+    sheets = [{'width': 70, 'height': 70, 'quantity': 1}]
+    assert NestingEngine(settings).nest(parts, sheets)['valid']
+    assert list((tmp_path / 'nfp').rglob('*.wkb'))
+    again = NestingEngine(settings)
+    assert again.nest(parts, sheets)['valid']
+    assert again.nfp_cache.misses == 0 and again.nfp_cache.disk_hits > 0
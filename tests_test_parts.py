@@ -1,13 +1,16 @@
 # tests/test_parts.py
 
+import math
+
 import pytest
-from core.cad_importer import CADImporter
+from ezdxf import new
+from shapely.geometry import LineString
+from core.cad_importer import CADImporter, import_files
 
 
 def test_import_line(tmp_path):
     # create a minimal DXF file with one LINE entity
     dxf_path = tmp_path / "test.dxf"
-    from ezdxf import new
     doc = new()
     msp = doc.modelspace()
     msp.add_line((0, 0), (10, 0))
@@ -16,5 +19,103 @@ def test_import_line(tmp_path):
     importer = CADImporter(str(dxf_path))
     geoms = importer.import_file()
     assert len(geoms) == 1
-    from shapely.geometry import LineString
     assert isinstance(geoms[0], LineString)
+
+
+def test_import_files_in_parallel(tmp_path):
+    paths = []
+    for i in range(3):
+        doc = new()
+        doc.modelspace().add_lwpolyline([(0, 0), (10 + i, 0), (10 + i, 5), (0, 5)], close=True)
+        path = tmp_path / f"part{i}.dxf"
+        doc.saveas(str(path))
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.dxf"))
+
+    results = {fp: (parts, error) for fp, parts, error in import_files(paths, workers=2)}
+    assert set(results) == set(paths)
+    assert results[paths[3]][1] is not None
+    for i in range(3):
+        parts, error = results[paths[i]]
+        assert error is None
+        assert parts[0]['width'] == 10 + i and parts[0]['area'] == 5 * (10 + i)
+
+
+def test_contours_keep_concavities_and_holes(tmp_path):
+    doc = new()
+    msp = doc.modelspace()
+    # L-shape from loose lines with endpoint gaps below the snap tolerance
+    corners = [(0, 0), (100, 0), (100, 40), (40, 40), (40, 100), (0, 100)]
+    for k, start in enumerate(corners):
+        end = corners[(k + 1) % len(corners)]
+        msp.add_line(start, (end[0] + 0.001, end[1] - 0.001))
+    msp.add_circle((20, 20), 10)                      # hole
+    msp.add_lwpolyline([(15, 15), (25, 15), (25, 25), (15, 25)], close=True)  # part inside the hole
+    # slot: two straight edges joined by bulged (semicircular) ends
+    msp.add_lwpolyline([(200, 0, 0, 0, 0), (260, 0, 0, 0, 1), (260, 20, 0, 0, 0), (200, 20, 0, 0, 1)],
+                       format='xyseb', close=True)
+    path = tmp_path / "shapes.dxf"
+    doc.saveas(str(path))
+
+    parts = sorted(CADImporter(str(path)).import_parts(), key=lambda p: -p['area'])
+    assert len(parts) == 3
+    l_shape, slot, island = parts
+    circle = math.pi * 10 ** 2
+    assert len(l_shape['geometry'].interiors) == 1
+    assert abs(l_shape['area'] - (100 * 40 + 60 * 40 - circle)) < 5
+    assert abs(slot['area'] - (60 * 20 + math.pi * 10 ** 2)) < 1
+    assert island['area'] == 100
+
+
+def test_streaming_import_matches_full_read(tmp_path):
+    doc = new()
+    msp = doc.modelspace()
+    for k in range(40):
+        x = 30.0 * k
+        msp.add_lwpolyline([(x, 0), (x + 20, 0), (x + 20, 20), (x, 20)], close=True, dxfattribs={'layer': f'L{k % 3}'})
+        msp.add_circle((x + 10, 10), 4)
+    msp.add_polyline2d([(0, 50), (40, 50), (40, 90)], close=True)
+    for start, end in [((100, 50), (140, 50)), ((140, 50), (140, 90)), ((140, 90), (100, 50))]:
+        msp.add_line(start, end)
+    msp.add_text('ignored')
+    path = tmp_path / "big.dxf"
+    doc.saveas(str(path))
+
+    full = CADImporter(str(path), {'streaming': False, 'scale': 2})
+    streamed = CADImporter(str(path), {'streaming': True, 'scale': 2})
+    assert streamed.streaming() and not full.streaming()
+    a, b = full.import_parts(), streamed.import_parts()
+    assert len(a) == len(b) == 42
+    assert [p['layer'] for p in a] == [p['layer'] for p in b]
+    assert all(p['geometry'].equals(q['geometry']) for p, q in zip(a, b))
+    assert sum(len(p['geometry'].interiors) for p in b) == 40
+    # every vertex lives in one flat array
+    assert streamed.outlines.coords.dtype == float and len(streamed.outlines) == 84
+
+
+def test_plate_separates_into_parts(tmp_path):
+    doc = new()
+    msp = doc.modelspace()
+    # 20 x 20 plate of washers: outer square, round hole, each a part of its own
+    for row in range(20):
+        for col in range(20):
+            x, y = 30.0 * col, 30.0 * row
+            msp.add_lwpolyline([(x, y), (x + 20, y), (x + 20, y + 20), (x, y + 20)], close=True)
+            msp.add_circle((x + 10, y + 10), 5)
+    # the same outline drawn twice, and a part drawn as two overlapping pieces
+    for _ in range(2):
+        msp.add_lwpolyline([(0, -50), (20, -50), (20, -30), (0, -30)], close=True)
+    msp.add_lwpolyline([(100, -50), (140, -50), (140, -40), (100, -40)], close=True)
+    msp.add_lwpolyline([(100, -50), (110, -50), (110, -10), (100, -10)], close=True)
+    path = tmp_path / "plate.dxf"
+    doc.saveas(str(path))
+
+    parts = CADImporter(str(path)).import_parts()
+    assert len(parts) == 402
+    washers = [p for p in parts if p['geometry'].interiors]
+    assert len(washers) == 400
+    assert all(len(p['geometry'].interiors) == 1 and p['width'] == 20 for p in washers)
+    duplicate, cross = sorted((p for p in parts if not p['geometry'].interiors), key=lambda p: p['area'])
+    assert duplicate['area'] == 400
+    assert cross['area'] == 40 * 10 + 10 * 30
+    assert len({p['name'] for p in parts}) == 402
@@ -0,0 +1,35 @@
+# tests/test_placement.py
+
+import numpy as np
+from core import instrumentation
+from core.placement import BottomLeftDecoder
+
+
+def test_bottom_left_decoder_packs_without_overlap():
+    # five 10x10 squares on a 25x25 sheet with 1 mm spacing and margin: four fit
+    sizes = np.full((1, 5, 2), 10.0)
+    decoder = BottomLeftDecoder(sizes, {'width': 25, 'height': 25}, spacing=1.0, margin=1.0)
+    pos, placed = decoder.decode(np.array([2, 0, 4, 3, 1]), np.zeros(5, dtype=int))
+    assert placed.tolist() == [True, False, True, True, True]
+    assert [tuple(pos[i]) for i in (2, 0, 4, 3)] == [(1, 1), (12, 1), (1, 12), (12, 12)]
+    assert pos[1][0] >= 25
+
+
+def test_bottom_left_decoder_replays_the_shared_prefix():
+    rng = np.random.default_rng(3)
+    sizes = rng.uniform(5, 30, (2, 40, 2))
+    decoder = BottomLeftDecoder(sizes, {'width': 200, 'height': 200}, spacing=1.0)
+    order, rot = rng.permutation(40), rng.integers(0, 2, 40)
+    pos, placed = decoder.decode(order, rot)
+    assert placed.all()
+    # swap two late order slots: only parts from the first of them on move
+    late = order.copy()
+    late[[35, 38]] = late[[38, 35]]
+    with instrumentation.recording() as recorder:
+        full = decoder.decode(late, rot)
+    assert recorder.summary()['counters'] == {'placement.reused': 0, 'placement.searched': 40}
+    with instrumentation.recording() as recorder:
+        replayed = decoder.decode(late, rot, base=(order, rot, pos))
+    assert recorder.summary()['counters'] == {'placement.reused': 35, 'placement.searched': 5}
+    assert np.array_equal(replayed[0], full[0])
+    assert np.array_equal(replayed[1], full[1])
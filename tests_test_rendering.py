@@ -0,0 +1,47 @@
+# tests/test_rendering.py
+
+from PyQt6.QtWidgets import QGraphicsScene
+from shapely.geometry import Point, Polygon, box
+
+from ui.dialogs.cad_importer_dialog import CadImporterDialog
+from ui.rendering import ERROR_PEN, GeometryItem, LODPaths, PathCache, draw_layouts
+
+
+def test_lod_paths_coarsen_with_zoom(qapp):
+    ring = Point(0, 0).buffer(100, quad_segs=256).difference(Point(0, 0).buffer(40))
+    paths = LODPaths(ring)
+    assert paths.level(0.01) == 0
+    assert paths.level(10.0) == len(paths.tolerances) - 1
+    full, coarse = paths.path(0.01), paths.path(10.0)
+    assert coarse.elementCount() < full.elementCount() / 4
+    # the hole stays a hole
+    assert not full.contains(full.boundingRect().center())
+
+
+def test_layouts_share_cached_paths(qapp):
+    ell = {'geometry': Polygon([(0, 0), (30, 0), (30, 10), (10, 10), (10, 25), (0, 25)])}
+    sheet = {'width': 100, 'height': 100}
+    genes = [{'part': ell, 'angle': a, 'pos': (40.0 * (k % 2), 40.0 * (k // 2))}
+             for k, a in enumerate([0, 90, 0, 90])]
+    result = {'sheets': [{'sheet': sheet, 'genes': genes, 'violations': {'collisions': [(0, 1)], 'outside': []}},
+                         {'sheet': sheet, 'genes': [dict(genes[0], pos=(5.0, 5.0))]}]}
+    scene, cache = QGraphicsScene(), PathCache()
+    draw_layouts(scene, result, cache)
+    items = [i for i in scene.items() if isinstance(i, GeometryItem)]
+    assert len(items) == 5 and len(cache) == 2
+    rotated = next(i for i in items if i.paths is cache.get(ell['geometry'], 90))
+    assert rotated.paths.rect.width() == 25
+    assert sum(i.pen is ERROR_PEN for i in items) == 2
+    # second sheet sits beside the first, not on top of it
+    assert max(i.sceneBoundingRect().left() for i in items) > 100
+
+
+def test_importer_preview_shows_every_part(qtbot):
+    dialog = CadImporterDialog([])
+    qtbot.addWidget(dialog)
+    dialog.imported_parts = [{'geometry': box(0, 0, 5 + i, 5)} for i in range(25)]
+    dialog._preview_all_parts()
+    items = dialog.processed_scene.items()
+    assert len(items) == 25
+    rects = [i.sceneBoundingRect() for i in items]
+    assert not any(a.intersects(b) for n, a in enumerate(rects) for b in rects[n + 1:])
@@ -0,0 +1,27 @@
+# tests/test_rotations.py
+
+import numpy as np
+import pytest
+from shapely.affinity import rotate, translate
+from shapely.geometry import Polygon
+from core.collision import place
+from core.rotations import RotationTable
+
+
+def test_rotation_table_matches_shapely():
+    ell = Polygon([(0, 0), (30, 0), (30, 10), (10, 10), (10, 25), (0, 25)], [[(2, 2), (6, 2), (6, 6), (2, 6)]])
+    angles = [0, 37.5, 90, 270]
+    table = RotationTable([ell, {'width': 4, 'height': 6}], angles)
+    assert table.sizes.shape == (4, 2, 2)
+    assert table.sizes[2, 1] == pytest.approx((6, 4))
+    for a, angle in enumerate(angles):
+        rotated = rotate(ell, angle, origin=(0, 0))
+        assert table.bounds[a, 0] == pytest.approx(rotated.bounds)
+        expected = translate(rotated, -rotated.bounds[0], -rotated.bounds[1])
+        assert table.geometry(0, angle).equals_exact(expected, 1e-9)
+        assert table.geometry(0, angle).area == pytest.approx(table.areas[0])
+    placed = table.place_many([0, 1, 0], [1, 2, 3], [(5, 5), (50, 0), (0, 40)])
+    assert placed[0].equals_exact(place(ell, 37.5, (5, 5))[0], 1e-9)
+    assert placed[1].bounds == pytest.approx((50, 0, 56, 4))
+    assert len(placed[2].interiors) == 1
+    assert np.all(table.sizes > 0)